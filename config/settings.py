@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 
 import dj_database_url
+import django
 from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,6 +31,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "letters.middleware.RequestLogMiddleware",
+    "letters.middleware.ProfilingMiddleware",
+    "letters.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -60,17 +64,87 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
+DB_POOL_ENABLED = config("DB_POOL_ENABLED", default=True, cast=bool)
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", default=2, cast=int)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", default=8, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=float)
+DB_POOL_MAX_IDLE = config("DB_POOL_MAX_IDLE", default=300, cast=float)
+DB_POOL_MAX_LIFETIME = config("DB_POOL_MAX_LIFETIME", default=1800, cast=float)
+SQLITE_TUNED = config("SQLITE_TUNED", default=True, cast=bool)
+SQLITE_BUSY_TIMEOUT_MS = config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int)
+SQLITE_MMAP_SIZE_MB = config("SQLITE_MMAP_SIZE_MB", default=256, cast=int)
+SQLITE_CACHE_SIZE_MB = config("SQLITE_CACHE_SIZE_MB", default=64, cast=int)
+# Run on every new connection; journal_mode sticks to the file, the others are per connection.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+    f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_MB * 1024}",
+]
+
+
+def _is_database_url(url: str) -> bool:
+    return bool(url) and "://" in url and not url.startswith("://")
+
+
+def _database_from_url(url: str) -> dict:
+    database = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    if DB_POOL_ENABLED and database["ENGINE"] == "django.db.backends.postgresql" and django.VERSION >= (5, 1):
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return database
+        # The pool replaces persistent connections; Django refuses CONN_MAX_AGE together with "pool".
+        database["CONN_MAX_AGE"] = 0
+        # With a pool, Django turns CONN_HEALTH_CHECKS into ConnectionPool(check=...) itself; passing "check" in
+        # the pool options as well makes the pool constructor fail.
+        database["CONN_HEALTH_CHECKS"] = True
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+            "max_lifetime": DB_POOL_MAX_LIFETIME,
+        }
+    return database
+
+
+def _tune_sqlite(database: dict) -> dict:
+    if not SQLITE_TUNED or database["ENGINE"] != "django.db.backends.sqlite3":
+        return database
+    options = database.setdefault("OPTIONS", {})
+    # Python's sqlite3 waits this long for a lock before raising "database is locked".
+    options["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+    if django.VERSION >= (5, 1):
+        options["init_command"] = ";".join(SQLITE_PRAGMAS)
+        # Take the write lock at BEGIN: a deferred transaction that reads and then writes fails at once with
+        # "database is locked" when another writer got in first, and busy_timeout cannot retry it.
+        options["transaction_mode"] = "IMMEDIATE"
+    return database
+
+
 database_url = config("DATABASE_URL", default="")
-if database_url and "://" in database_url and not database_url.startswith("://"):
-    DATABASES = {"default": dj_database_url.parse(database_url, conn_max_age=600)}
+if _is_database_url(database_url):
+    DATABASES = {"default": _tune_sqlite(_database_from_url(database_url))}
 else:
     DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
-        }
+        "default": _tune_sqlite(
+            {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": BASE_DIR / "db.sqlite3",
+            }
+        )
     }
 
+# Optional read replica for read-only public pages (see letters/routers.py).
+database_replica_url = config("DATABASE_REPLICA_URL", default="")
+if _is_database_url(database_replica_url):
+    DATABASES["replica"] = _database_from_url(database_replica_url)
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["letters.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=30, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -86,7 +160,6 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 configured_media_root = config("MEDIA_ROOT", default="").strip()
@@ -103,8 +176,84 @@ MEDIA_FALLBACK_DIRS = [
     "/var/data/media",
 ]
 
+# Photos stay on the local disk unless an S3-compatible bucket is configured (AWS, R2, MinIO...).
+PHOTO_STORAGE_BUCKET = config("PHOTO_STORAGE_BUCKET", default="")
+PHOTO_STORAGE_ENDPOINT_URL = config("PHOTO_STORAGE_ENDPOINT_URL", default="")
+PHOTO_STORAGE_REGION = config("PHOTO_STORAGE_REGION", default="")
+PHOTO_STORAGE_ACCESS_KEY = config("PHOTO_STORAGE_ACCESS_KEY", default="")
+PHOTO_STORAGE_SECRET_KEY = config("PHOTO_STORAGE_SECRET_KEY", default="")
+PHOTO_URL_EXPIRE_SECONDS = config("PHOTO_URL_EXPIRE_SECONDS", default=900, cast=int)
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+    "photos": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+}
+if PHOTO_STORAGE_BUCKET:
+    STORAGES["photos"] = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": PHOTO_STORAGE_BUCKET,
+            "endpoint_url": PHOTO_STORAGE_ENDPOINT_URL or None,
+            "region_name": PHOTO_STORAGE_REGION or None,
+            "access_key": PHOTO_STORAGE_ACCESS_KEY or None,
+            "secret_key": PHOTO_STORAGE_SECRET_KEY or None,
+            "default_acl": None,
+            "file_overwrite": False,
+            "querystring_auth": True,
+            "querystring_expire": PHOTO_URL_EXPIRE_SECONDS,
+            "object_parameters": {"CacheControl": "private, max-age=31536000, immutable"},
+        },
+    }
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+SITE_URL = config("SITE_URL", default=f"https://{RENDER_EXTERNAL_HOSTNAME}" if RENDER_EXTERNAL_HOSTNAME else "http://localhost:8000")
+VIEW_COUNTER_FLUSH_SECONDS = config("VIEW_COUNTER_FLUSH_SECONDS", default=10, cast=float)
+EXPORT_CACHE_DIR = Path(config("EXPORT_CACHE_DIR", default=str(MEDIA_ROOT.parent / "exports")))
+EXPORT_CACHE_HOURS = config("EXPORT_CACHE_HOURS", default=24, cast=int)
+RESUMABLE_UPLOAD_DIR = Path(config("RESUMABLE_UPLOAD_DIR", default=str(MEDIA_ROOT.parent / "uploads")))
+RESUMABLE_UPLOAD_EXPIRE_HOURS = config("RESUMABLE_UPLOAD_EXPIRE_HOURS", default=24, cast=int)
+RESUMABLE_UPLOAD_CHUNK_KB = config("RESUMABLE_UPLOAD_CHUNK_KB", default=512, cast=int)
+RESUMABLE_UPLOAD_CONCURRENCY = config("RESUMABLE_UPLOAD_CONCURRENCY", default=2, cast=int)
+LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+LOG_QUEUE_SIZE = config("LOG_QUEUE_SIZE", default=10000, cast=int)
+LOG_REQUEST_SAMPLE_RATE = config("LOG_REQUEST_SAMPLE_RATE", default=1.0 if DEBUG else 0.05, cast=float)
+LOG_SLOW_REQUEST_MS = config("LOG_SLOW_REQUEST_MS", default=1000, cast=float)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"json": {"()": "letters.logs.JsonFormatter"}},
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "json", "stream": "ext://sys.stdout"},
+        "queue": {
+            "()": "letters.logs.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console"],
+            "queue_size": LOG_QUEUE_SIZE,
+        },
+    },
+    "root": {"handlers": ["queue"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+        "django.server": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+    },
+}
+
+QUERY_BUDGET_MODE = config("QUERY_BUDGET_MODE", default="log" if DEBUG else "off")
+PROFILING_TOKEN_MAX_AGE = config("PROFILING_TOKEN_MAX_AGE", default=3600, cast=int)
+PROFILING_MAX_RECORDS = config("PROFILING_MAX_RECORDS", default=50, cast=int)
+
+FILE_UPLOAD_HANDLERS = [
+    "letters.uploads.HashingMemoryFileUploadHandler",
+    "letters.uploads.HashingTemporaryFileUploadHandler",
+]
+BULK_IMPORT_MAX_ROWS = config("BULK_IMPORT_MAX_ROWS", default=1000, cast=int)
+BULK_QR_WORKERS = config("BULK_QR_WORKERS", default=2, cast=int)
+DRAFT_RETENTION_DAYS = config("DRAFT_RETENTION_DAYS", default=30, cast=int)
+PAYMENT_HOT_DAYS = config("PAYMENT_HOT_DAYS", default=60, cast=int)
+PAYMENT_PAYLOAD_ARCHIVE_DAYS = config("PAYMENT_PAYLOAD_ARCHIVE_DAYS", default=180, cast=int)
+PAYMENT_PARTITION_MONTHS_AHEAD = config("PAYMENT_PARTITION_MONTHS_AHEAD", default=3, cast=int)
+
 LOVE_LETTER_PRICE = config("LOVE_LETTER_PRICE", default="3.99")
 PIX_KEY = config("PIX_KEY", default="11948587422")
 PIX_KEY_TYPE = config("PIX_KEY_TYPE", default="phone")
@@ -139,4 +288,11 @@ EMAIL_USE_SSL = config("EMAIL_USE_SSL", default=False, cast=bool)
 EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=30, cast=int)
 
 if not DEBUG and EMAIL_BACKEND == "django.core.mail.backends.console.EmailBackend":
-    EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    EMAIL_BACKEND = "letters.outbox.OutboxEmailBackend"
+
+# letters.outbox.OutboxEmailBackend stores messages; they are delivered through this backend in batches.
+OUTBOX_DELIVERY_BACKEND = config("OUTBOX_DELIVERY_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
+OUTBOX_INPROCESS_SENDER = config("OUTBOX_INPROCESS_SENDER", default=True, cast=bool)
+OUTBOX_POLL_SECONDS = config("OUTBOX_POLL_SECONDS", default=15, cast=float)
+OUTBOX_MAX_ATTEMPTS = config("OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config("OUTBOX_RETRY_BASE_SECONDS", default=30, cast=int)
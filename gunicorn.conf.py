@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import random
+import threading
+import time
+
+# Sizing ---------------------------------------------------------------------
+
+WORKER_MEMORY_MB = int(os.getenv("GUNICORN_WORKER_MEMORY_MB", "160"))
+MAX_WORKER_RSS_MB = int(os.getenv("GUNICORN_MAX_WORKER_RSS_MB", "400"))
+
+
+def _memory_limit_mb() -> int | None:
+    # cgroup v2 first (Render, Docker), then cgroup v1.
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as handle:
+                raw = handle.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit() and int(raw) < 1 << 50:
+            return int(raw) // (1024 * 1024)
+    return None
+
+
+def _default_workers() -> int:
+    cpus = multiprocessing.cpu_count()
+    workers = cpus * 2 + 1
+    memory_mb = _memory_limit_mb()
+    if memory_mb:
+        workers = min(workers, memory_mb // WORKER_MEMORY_MB)
+    return max(workers, 1)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("GUNICORN_WORKERS") or os.getenv("WEB_CONCURRENCY") or _default_workers())
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Load Django once in the master so workers share the imported code copy-on-write.
+preload_app = True
+
+# Recycle workers periodically; the jitter keeps them from restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Requests are logged by letters.middleware.RequestLogMiddleware through the log queue; opt in to gunicorn's own line.
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# Hooks ----------------------------------------------------------------------
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return 0.0
+
+
+class _WorkerStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, status: int) -> None:
+        with self.lock:
+            self.requests += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if status >= 500:
+                self.errors += 1
+
+
+def post_fork(server, worker):
+    # Connections must never be shared between forked workers.
+    from django.db import connections
+
+    connections.close_all()
+    worker.stats = _WorkerStats()
+    random.seed()
+
+
+def pre_request(worker, req):
+    req.started_at = time.monotonic()
+
+
+def post_request(worker, req, environ, resp):
+    started_at = getattr(req, "started_at", None)
+    if started_at is not None and hasattr(worker, "stats"):
+        status = getattr(resp, "status_code", None) or int(str(resp.status).split()[0])
+        worker.stats.record((time.monotonic() - started_at) * 1000, status)
+
+    rss = _rss_mb()
+    if MAX_WORKER_RSS_MB and rss > MAX_WORKER_RSS_MB and worker.alive:
+        worker.log.info("Worker %s com %.0f MB de RSS (limite %s MB); reciclando.", worker.pid, rss, MAX_WORKER_RSS_MB)
+        worker.alive = False
+
+
+def worker_exit(server, worker):
+    stats = getattr(worker, "stats", None)
+    if stats is None or not stats.requests:
+        return
+    server.log.info(
+        "Worker %s: %s requisicoes, %s erros 5xx, media %.1f ms, max %.1f ms, RSS %.0f MB",
+        worker.pid,
+        stats.requests,
+        stats.errors,
+        stats.total_ms / stats.requests,
+        stats.max_ms,
+        _rss_mb(),
+    )
@@ -1,6 +1,24 @@
+import json
+
 from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
-from .models import LoveLetter, LovePhoto, PaymentRecord
+from .models import (
+    DailySalesRollup,
+    LoveLetter,
+    LovePhoto,
+    OutboxEmail,
+    PaymentPayloadArchive,
+    PaymentRecord,
+    PhotoBlob,
+    RequestProfile,
+)
+from .profiling import profile_summary
+from .rollups import sales_dashboard
 
 
 @admin.register(LoveLetter)
@@ -12,10 +30,93 @@ class LoveLetterAdmin(admin.ModelAdmin):
 
 @admin.register(LovePhoto)
 class LovePhotoAdmin(admin.ModelAdmin):
-    list_display = ("id", "letter", "created_at")
+    list_display = ("id", "letter", "blob", "created_at")
+
+
+@admin.register(PhotoBlob)
+class PhotoBlobAdmin(admin.ModelAdmin):
+    list_display = ("sha256", "name", "size", "ref_count", "created_at")
+    search_fields = ("sha256", "name")
+    readonly_fields = ("sha256", "name", "size", "ref_count", "created_at")
 
 
 @admin.register(PaymentRecord)
 class PaymentRecordAdmin(admin.ModelAdmin):
     list_display = ("id", "letter", "method", "status", "amount", "provider_payment_id", "created_at")
     list_filter = ("method", "status")
+
+
+@admin.register(PaymentPayloadArchive)
+class PaymentPayloadArchiveAdmin(admin.ModelAdmin):
+    list_display = ("payment_id", "letter_id", "payment_created_at", "archived_at")
+    search_fields = ("payment_id", "letter_id")
+    readonly_fields = ("payment_id", "letter_id", "payment_created_at", "archived_at", "payload_preview")
+    exclude = ("payload",)
+
+    @admin.display(description="payload")
+    def payload_preview(self, obj):
+        return format_html("<pre>{}</pre>", json.dumps(obj.load_payload(), ensure_ascii=False, indent=2))
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "method", "letters_created", "letters_paid", "revenue", "payments_started", "payments_paid")
+    list_filter = ("method",)
+    date_hierarchy = "day"
+    change_list_template = "admin/letters/dailysalesrollup/change_list.html"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        dashboard = self.admin_site.admin_view(self.dashboard_view)
+        return [path("painel/", dashboard, name="letters_dailysalesrollup_dashboard")] + super().get_urls()
+
+    def dashboard_view(self, request):
+        try:
+            days = int(request.GET.get("dias", 30))
+        except ValueError:
+            days = 30
+        context = {**self.admin_site.each_context(request), "title": "Vendas por dia", "opts": self.model._meta}
+        context.update(sales_dashboard(days))
+        return TemplateResponse(request, "admin/letters/sales_dashboard.html", context)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "attempts", "next_attempt_at", "sent_at", "created_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "view_name", "method", "path", "status", "duration_ms", "user", "download_link")
+    list_filter = ("view_name", "status")
+    search_fields = ("view_name", "path")
+    exclude = ("stats",)
+    readonly_fields = ("view_name", "method", "path", "status", "duration_ms", "user", "created_at", "download_link", "summary")
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        download = self.admin_site.admin_view(self.download_view)
+        return [path("<int:profile_id>/download/", download, name="letters_requestprofile_download")] + super().get_urls()
+
+    def download_view(self, request, profile_id: int):
+        record = get_object_or_404(RequestProfile, pk=profile_id)
+        response = HttpResponse(bytes(record.stats), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="profile-{record.pk}.prof"'
+        return response
+
+    @admin.display(description="Download")
+    def download_link(self, obj):
+        return format_html('<a href="{}">.prof</a>', reverse("admin:letters_requestprofile_download", args=[obj.pk]))
+
+    @admin.display(description="Resumo (cumulativo)")
+    def summary(self, obj):
+        return format_html("<pre>{}</pre>", profile_summary(obj))
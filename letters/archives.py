@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, Union
+
+ZipData = Union[bytes, Iterable[bytes]]
+STORED_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".heic", ".zip")
+
+
+class _ZipSink(io.RawIOBase):
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_info(name: str, modified: datetime | None) -> zipfile.ZipInfo:
+    # A fixed timestamp per entry keeps archives byte-identical across rebuilds of the same data.
+    date_time = modified.timetuple()[:6] if modified else (1980, 1, 1, 0, 0, 0)
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.compress_type = zipfile.ZIP_STORED if name.lower().endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+    return info
+
+
+def stream_zip(entries: Iterable[tuple[str, ZipData]] | Iterable[tuple[str, ZipData, datetime | None]]) -> Iterator[bytes]:
+    # The sink is not seekable, so zipfile writes data descriptors and at most one chunk is buffered.
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w") as archive:
+        for name, data, *rest in entries:
+            info = _zip_info(name, rest[0] if rest else None)
+            if isinstance(data, bytes):
+                archive.writestr(info, data)
+                yield sink.drain()
+                continue
+            with archive.open(info, mode="w", force_zip64=True) as member:
+                for chunk in data:
+                    member.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
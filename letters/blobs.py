@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import LoveLetter, LovePhoto, PhotoBlob
+from .read_models import refresh_letter_snapshot
+from .storage import photo_storage
+
+HASH_CHUNK_SIZE = 64 * 1024
+PHOTO_RELEASE_DISPATCH_UID = "letters_release_photo_file"
+# <upload_to>/ab/<sha256>[_suffix].ext; the suffix is what storages append when a name is already taken.
+HASHED_NAME_RE = re.compile(r"(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(?:_[A-Za-z0-9]+)?(?:\.[a-z0-9]{1,5})?$")
+
+
+@dataclass
+class PhotoRenameResult:
+    renamed: int = 0
+    photos: int = 0
+    skipped: int = 0
+    unlinked: int = 0
+    missing: list[str] = field(default_factory=list)
+    dry_run: bool = False
+
+
+def hashed_photo_name(digest: str, filename: str) -> str:
+    """Storage name derived from the content, so a given name can never point at different bytes."""
+    extension = os.path.splitext(filename)[1].lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,5}", extension):
+        extension = ""
+    field = LovePhoto._meta.get_field("image")
+    return field.generate_filename(None, f"{digest[:2]}/{digest}{extension}")
+
+
+def is_hashed_photo_name(name: str) -> bool:
+    return HASHED_NAME_RE.search(name) is not None
+
+
+def upload_digest(upload) -> str:
+    digest = getattr(upload, "sha256", None)
+    if digest:
+        return digest
+    # Files that did not come through the hashing upload handlers (shell, commands) are hashed here.
+    hasher = hashlib.sha256()
+    for chunk in upload.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    upload.seek(0)
+    return hasher.hexdigest()
+
+
+def _acquire_blob(digest: str, upload) -> PhotoBlob:
+    blob = PhotoBlob.objects.select_for_update().filter(sha256=digest).first()
+    if blob is not None:
+        return blob
+    storage = photo_storage()
+    name = storage.save(hashed_photo_name(digest, upload.name), upload)
+    try:
+        with transaction.atomic():
+            return PhotoBlob.objects.create(sha256=digest, name=name, size=upload.size or 0)
+    except IntegrityError:
+        # A concurrent upload of the same content won the insert; keep its file.
+        storage.delete(name)
+        return PhotoBlob.objects.select_for_update().get(sha256=digest)
+
+
+def attach_photo(letter: LoveLetter, upload) -> LovePhoto:
+    digest = upload_digest(upload)
+    with transaction.atomic():
+        blob = _acquire_blob(digest, upload)
+        PhotoBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        return LovePhoto.objects.create(letter=letter, image=blob.name, blob=blob)
+
+
+def release_photo_files(photos: Iterable[tuple[int | None, str]]) -> list[str]:
+    """Drop references held by deleted photos and return the file names nobody uses anymore."""
+    photos = list(photos)
+    blob_refs = Counter(blob_id for blob_id, _ in photos if blob_id is not None)
+    legacy_names = {name for blob_id, name in photos if blob_id is None and name}
+    freed: list[str] = []
+    with transaction.atomic():
+        for blob_id, count in blob_refs.items():
+            PhotoBlob.objects.filter(pk=blob_id).update(ref_count=F("ref_count") - count)
+        unused = PhotoBlob.objects.select_for_update().filter(pk__in=blob_refs, ref_count=0)
+        freed.extend(unused.values_list("name", flat=True))
+        unused.delete()
+    if legacy_names:
+        # Photos uploaded before blobs existed own their file unless a backfill pointed others at it.
+        still_used = set(LovePhoto.objects.filter(image__in=legacy_names).values_list("image", flat=True))
+        freed.extend(sorted(legacy_names - still_used))
+    return freed
+
+
+def delete_files(names: Iterable[str]) -> None:
+    storage = photo_storage()
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            continue
+
+
+def _copy_to(storage, name: str, target: str) -> str | None:
+    try:
+        with storage.open(name, "rb") as handle:
+            return storage.save(target, handle)
+    except OSError:
+        return None
+
+
+def _rename_batch(blobs: list[tuple[int, str, str]], storage, executor, result: PhotoRenameResult) -> None:
+    # Copy first and repoint afterwards, so a crash midway leaves rows pointing at files that still exist.
+    copies = [(name, hashed_photo_name(sha256, name)) for _, name, sha256 in blobs]
+    saved_names = executor.map(lambda copy: _copy_to(storage, *copy), copies)
+    renamed = []
+    for (blob_id, name, _), saved_name in zip(blobs, saved_names):
+        if saved_name is None:
+            result.missing.append(name)
+        else:
+            renamed.append((blob_id, name, saved_name))
+    if not renamed:
+        return
+
+    with transaction.atomic():
+        for blob_id, _, saved_name in renamed:
+            PhotoBlob.objects.filter(pk=blob_id).update(name=saved_name)
+            result.photos += LovePhoto.objects.filter(blob_id=blob_id).update(image=saved_name)
+        photos = LovePhoto.objects.filter(blob_id__in=[blob_id for blob_id, _, _ in renamed])
+        letter_ids = set(photos.values_list("letter_id", flat=True))
+    result.renamed += len(renamed)
+
+    # Snapshots carry photo names; rebuilding them also changes the page ETags so cached HTML picks up the new URLs.
+    for letter in LoveLetter.objects.filter(id__in=letter_ids, snapshot__isnull=False).prefetch_related("photos"):
+        refresh_letter_snapshot(letter)
+
+    old_names = {name for _, name, _ in renamed}
+    # Photos never linked to a blob may still point at the old name; they keep it.
+    old_names -= set(LovePhoto.objects.filter(image__in=old_names).values_list("image", flat=True))
+    list(executor.map(lambda name: delete_files([name]), sorted(old_names)))
+
+
+def rename_photos_by_hash(*, batch_size: int = 200, workers: int = 8, dry_run: bool = False) -> PhotoRenameResult:
+    """Copies every blob stored under its upload name to its content-hash name and repoints the rows."""
+    result = PhotoRenameResult(dry_run=dry_run)
+    result.unlinked = LovePhoto.objects.filter(blob__isnull=True).exclude(image="").count()
+    storage = photo_storage()
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rows = list(PhotoBlob.objects.filter(pk__gt=last_id).order_by("id").values_list("id", "name", "sha256")[:batch_size])
+            if not rows:
+                return result
+            last_id = rows[-1][0]
+            pending = [row for row in rows if not is_hashed_photo_name(row[1])]
+            result.skipped += len(rows) - len(pending)
+            if dry_run:
+                result.renamed += len(pending)
+                result.photos += LovePhoto.objects.filter(blob_id__in=[row[0] for row in pending]).count()
+                continue
+            if pending:
+                _rename_batch(pending, storage, executor, result)
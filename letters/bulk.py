@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from .forms import BulkLetterRowForm
+from .models import LoveLetter
+from .rollups import record_letters_created
+from .utils import detect_music_provider, generate_qr_bytes
+
+INSERT_BATCH_SIZE = 500
+# What a malformed upload raises while being read; reported as a file error instead of a 500.
+FILE_READ_ERRORS = (UnicodeDecodeError, ValueError, csv.Error)
+
+
+@dataclass
+class BulkImportResult:
+    letters: list[LoveLetter] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+def iter_rows(stream: IO[bytes], filename: str) -> Iterator[dict]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if filename.lower().endswith(".csv"):
+        yield from csv.DictReader(text)
+        return
+    if filename.lower().endswith(".jsonl"):
+        for line in text:
+            if line.strip():
+                yield json.loads(line)
+        return
+    # Plain JSON arrays cannot be parsed incrementally with the stdlib; use .csv or .jsonl for large files.
+    yield from json.load(text)
+
+
+def import_letters(user, rows: Iterable[dict], *, max_rows: int | None = None) -> BulkImportResult:
+    max_rows = max_rows or settings.BULK_IMPORT_MAX_ROWS
+    result = BulkImportResult()
+    pending: list[LoveLetter] = []
+    # Rows are validated as they stream in; nothing is written unless the whole file is valid.
+    for number, row in enumerate(rows, start=1):
+        if number > max_rows:
+            result.errors.append(f"Limite de {max_rows} cartas por importacao excedido.")
+            break
+        if not isinstance(row, dict):
+            result.errors.append(f"Linha {number}: formato invalido.")
+            continue
+        # JSON rows may carry numbers or nulls; the form only deals with text.
+        form = BulkLetterRowForm({key: "" if value is None else str(value).strip() for key, value in row.items() if key})
+        if not form.is_valid():
+            for field_name, messages in form.errors.items():
+                result.errors.append(f"Linha {number}: {field_name}: {' '.join(messages)}")
+            continue
+        letter = form.save(commit=False)
+        letter.user = user
+        letter.music_provider = detect_music_provider(letter.music_url)
+        pending.append(letter)
+
+    if result.errors:
+        return result
+    with transaction.atomic():
+        for start in range(0, len(pending), INSERT_BATCH_SIZE):
+            result.letters.extend(LoveLetter.objects.bulk_create(pending[start : start + INSERT_BATCH_SIZE]))
+        # bulk_create skips post_save, so the daily rollup is bumped once for the whole import.
+        record_letters_created(len(result.letters))
+    return result
+
+
+def public_links(letters: list[LoveLetter], base_url: str) -> list[str]:
+    base_url = base_url.rstrip("/")
+    return [base_url + reverse("letters:public_letter", kwargs={"letter_id": str(letter.id)}) for letter in letters]
+
+
+def iter_qr_codes(links: list[str], *, workers: int = 0) -> Iterator[bytes]:
+    # Inline by default: web requests must not spawn interpreters inside a gunicorn worker (memory the worker sizing
+    # does not account for, and startup costs more than a few codes). import_letters opts into the process pool.
+    if workers <= 1:
+        yield from map(generate_qr_bytes, links)
+        return
+    # QR rendering is CPU-bound; a spawn-based process pool keeps it off the GIL and safe next to threads.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        yield from executor.map(generate_qr_bytes, links, chunksize=16)
+
+
+def qr_zip_entries(letters: list[LoveLetter], links: list[str], *, workers: int = 0) -> Iterator[tuple[str, bytes]]:
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["arquivo", "para", "link"])
+    for index, (letter, png) in enumerate(zip(letters, iter_qr_codes(links, workers=workers)), start=1):
+        name = f"{index:04d}-{letter.id}.png"
+        writer.writerow([name, letter.beloved_name, links[index - 1]])
+        yield name, png
+    yield "cartas.csv", manifest.getvalue().encode("utf-8")
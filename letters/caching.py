@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .storage import photo_storage
+
+PRIVATE_REVALIDATE = {"private": True, "no_cache": True}
+PUBLIC_SHORT = {"public": True, "max_age": 60}
+PUBLIC_HOUR = {"public": True, "max_age": 3600}
+# Content-hashed photo names never change bytes, so browsers may keep them for a year without revalidating.
+PUBLIC_IMMUTABLE = {"public": True, "max_age": 31536000, "immutable": True}
+
+
+def build_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def photo_url_epoch() -> int:
+    # Presigned photo URLs expire: rotate the validator at half their lifetime so cached pages keep working links.
+    if isinstance(photo_storage(), FileSystemStorage):
+        return 0
+    return int(time.time() // max(settings.PHOTO_URL_EXPIRE_SECONDS // 2, 1))
+
+
+def _apply_validators(response: HttpResponse, etag: str, last_modified: datetime | None, cache_control: dict) -> HttpResponse:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+def not_modified_response(
+    request: HttpRequest, *, etag: str, last_modified: datetime | None, cache_control: dict
+) -> HttpResponse | None:
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        return None
+    return _apply_validators(response, etag, last_modified, cache_control)
+
+
+def with_validators(response: HttpResponse, *, etag: str, last_modified: datetime | None, cache_control: dict) -> HttpResponse:
+    return _apply_validators(response, etag, last_modified, cache_control)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import LetterStats, LoveLetter
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    # Views are counted in memory and flushed in one upsert per interval, so public_letter stays read-only.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[str, list] = {}
+        self._flusher: threading.Thread | None = None
+
+    def record(self, letter_id: str, *, opened: bool) -> None:
+        now = timezone.now()
+        with self._lock:
+            entry = self._pending.setdefault(letter_id, [0, 0, None, None])
+            entry[0] += 1
+            if opened:
+                entry[1] += 1
+                entry[2] = entry[2] or now
+                entry[3] = now
+            if self._flusher is None:
+                self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        self._flusher = threading.Thread(target=self._flush_forever, name="view-counter-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        stop = threading.Event()
+        while not stop.wait(settings.VIEW_COUNTER_FLUSH_SECONDS):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Falha ao gravar contadores de visualizacao")
+            finally:
+                close_old_connections()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        _upsert(pending, timezone.now())
+        return len(pending)
+
+
+def _upsert(pending: dict[str, list], now: datetime) -> None:
+    ops = connection.ops
+    table = ops.quote_name(LetterStats._meta.db_table)
+    letters_table = ops.quote_name(LoveLetter._meta.db_table)
+    letter_field = LetterStats._meta.get_field("letter")
+    # INSERT ... ON CONFLICT works on both PostgreSQL and SQLite >= 3.24; EXISTS skips letters deleted meanwhile.
+    sql = f"""
+        INSERT INTO {table} (letter_id, views, opens, first_opened_at, last_opened_at, updated_at)
+        SELECT %s, %s, %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {letters_table} WHERE id = %s)
+        ON CONFLICT (letter_id) DO UPDATE SET
+            views = {table}.views + excluded.views,
+            opens = {table}.opens + excluded.opens,
+            first_opened_at = COALESCE({table}.first_opened_at, excluded.first_opened_at),
+            last_opened_at = COALESCE(excluded.last_opened_at, {table}.last_opened_at),
+            updated_at = excluded.updated_at
+    """
+    params = []
+    for letter_id, (views, opens, first_opened_at, last_opened_at) in pending.items():
+        letter_pk = letter_field.get_db_prep_value(letter_id, connection)
+        params.append(
+            (
+                letter_pk,
+                views,
+                opens,
+                ops.adapt_datetimefield_value(first_opened_at),
+                ops.adapt_datetimefield_value(last_opened_at),
+                ops.adapt_datetimefield_value(now),
+                letter_pk,
+            )
+        )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+view_counters = ViewCounterBuffer()
+atexit.register(lambda: view_counters.flush())
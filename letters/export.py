@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpRequest, HttpResponse, StreamingHttpResponse
+
+from .archives import stream_zip
+from .models import LoveLetter, LovePhoto, PaymentRecord
+
+EXPORT_VERSION = 1
+EXPORT_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def export_fingerprint(user) -> str:
+    letters = LoveLetter.objects.filter(user=user).aggregate(total=Count("id"), changed=Max("updated_at"))
+    photos = LovePhoto.objects.filter(letter__user=user).aggregate(total=Count("id"), last=Max("id"))
+    payments = PaymentRecord.objects.filter(letter__user=user).aggregate(total=Count("id"), changed=Max("updated_at"))
+    parts = [EXPORT_VERSION, user.pk, user.username, user.email, *letters.values(), *photos.values(), *payments.values()]
+    return hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def export_cache_path(user, fingerprint: str) -> Path:
+    return Path(settings.EXPORT_CACHE_DIR) / f"user-{user.pk}-{fingerprint}.zip"
+
+
+def _photo_member(letter_id, photo_id: int, name: str) -> str:
+    return f"fotos/{letter_id}/{photo_id}-{os.path.basename(name)}"
+
+
+def _json_line(data: dict) -> bytes:
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _iter_letter_lines(user) -> Iterator[bytes]:
+    letters = LoveLetter.objects.filter(user=user).order_by("created_at", "id").prefetch_related("photos")
+    for letter in letters.iterator(chunk_size=200):
+        yield _json_line(
+            {
+                "id": letter.id,
+                "beloved_name": letter.beloved_name,
+                "beloved_nickname": letter.beloved_nickname,
+                "sender_name": letter.sender_name,
+                "relationship_status": letter.relationship_status,
+                "relationship_custom": letter.relationship_custom,
+                "message": letter.message,
+                "tone": letter.tone,
+                "music_url": letter.music_url,
+                "music_provider": letter.music_provider,
+                "price": letter.price,
+                "is_paid": letter.is_paid,
+                "paid_at": letter.paid_at,
+                "is_protected": bool(letter.password_hash),
+                "release_at": letter.release_at,
+                "created_at": letter.created_at,
+                "updated_at": letter.updated_at,
+                "photos": [_photo_member(letter.id, photo.id, photo.image.name) for photo in letter.photos.all() if photo.image],
+            }
+        )
+
+
+def _iter_payment_lines(user) -> Iterator[bytes]:
+    payments = PaymentRecord.objects.filter(letter__user=user).order_by("created_at", "id")
+    fields = ("id", "letter_id", "method", "provider_payment_id", "amount", "status", "created_at", "updated_at")
+    for payment in payments.values(*fields).iterator(chunk_size=500):
+        yield _json_line(payment)
+
+
+def iter_export_entries(user) -> Iterator[tuple]:
+    account = {"username": user.username, "email": user.email, "date_joined": user.date_joined}
+    yield "conta.json", json.dumps(account, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2).encode("utf-8")
+    yield "cartas.jsonl", _iter_letter_lines(user)
+    yield "pagamentos.jsonl", _iter_payment_lines(user)
+
+    storage = LovePhoto._meta.get_field("image").storage
+    photos = LovePhoto.objects.filter(letter__user=user).exclude(image="").order_by("letter__created_at", "letter_id", "id")
+    for photo_id, letter_id, name, created_at in photos.values_list("id", "letter_id", "image", "created_at").iterator(
+        chunk_size=500
+    ):
+        try:
+            handle = storage.open(name, "rb")
+        except OSError:
+            continue
+        with handle:
+            yield _photo_member(letter_id, photo_id, name), handle.chunks(EXPORT_CHUNK_SIZE), created_at
+
+
+def _remove_stale_exports(user, keep: Path) -> None:
+    cutoff = time.time() - settings.EXPORT_CACHE_HOURS * 3600
+    user_prefix = f"user-{user.pk}-"
+    with os.scandir(keep.parent) as entries:
+        for entry in entries:
+            if entry.path == str(keep) or not entry.is_file():
+                continue
+            try:
+                if entry.name.startswith(user_prefix) or entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+
+def iter_export_and_cache(user, path: Path) -> Iterator[bytes]:
+    # Tee the archive to disk while streaming; only a fully written file becomes the cached copy.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.part")
+    complete = False
+    try:
+        with open(partial, "wb") as handle:
+            for chunk in stream_zip(iter_export_entries(user)):
+                if chunk:
+                    handle.write(chunk)
+                    yield chunk
+        os.replace(partial, path)
+        complete = True
+        _remove_stale_exports(user, keep=path)
+    finally:
+        if not complete:
+            partial.unlink(missing_ok=True)
+
+
+def build_export_file(user, path: Path) -> None:
+    for _ in iter_export_and_cache(user, path):
+        pass
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    # Only single ranges are supported; anything else falls back to the full body.
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # A zero-length suffix (bytes=-0) or an empty file has no byte to send (RFC 9110 14.1.1).
+        if int(end) == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _iter_file_range(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(EXPORT_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request: HttpRequest, path: Path, *, etag: str, filename: str) -> HttpResponse:
+    size = path.stat().st_size
+    header = request.headers.get("Range", "")
+    if_range = request.headers.get("If-Range")
+    if header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _byte_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _iter_file_range(path, start, end - start + 1), status=206, content_type="application/zip"
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type="application/zip")
@@ -1,8 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm, UserCreationForm
 from django.contrib.auth.models import User
-from PIL import Image
+from django.utils import timezone
 
+from . import providers
 from .models import LoveLetter
 
 
@@ -40,7 +41,7 @@ class MultipleImageField(forms.FileField):
         for uploaded in data:
             try:
                 cleaned = single_clean(uploaded, initial)
-                image = Image.open(cleaned)
+                image = providers.pil_image().open(cleaned)
                 image.verify()
                 cleaned.seek(0)
                 cleaned_files.append(cleaned)
@@ -99,6 +100,35 @@ class Step3Form(StyledFormMixin, forms.ModelForm):
         self._style_fields()
 
 
+class BulkLetterRowForm(forms.ModelForm):
+    message = forms.CharField(required=True, max_length=2000)
+
+    class Meta:
+        model = LoveLetter
+        fields = [
+            "beloved_name",
+            "beloved_nickname",
+            "sender_name",
+            "relationship_status",
+            "relationship_custom",
+            "message",
+            "tone",
+            "music_url",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Spreadsheet rows usually leave optional columns empty; fall back to the model default.
+        self.fields["tone"].required = False
+
+    def clean_tone(self):
+        return self.cleaned_data.get("tone") or "romantico"
+
+
+class BulkImportForm(StyledFormMixin, forms.Form):
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={"accept": ".csv,.json,.jsonl", "class": BASE_INPUT_CLASS}))
+
+
 class PhotoUploadForm(StyledFormMixin, forms.Form):
     photos = MultipleImageField(
         required=False,
@@ -139,11 +169,31 @@ class PasswordProtectionForm(StyledFormMixin, forms.Form):
         min_length=4,
         widget=forms.PasswordInput(attrs={"placeholder": "Senha (opcional, mínimo 4 caracteres)"}),
     )
+    release_at = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local"}, format="%Y-%m-%dT%H:%M"),
+    )
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, current_release_at=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.current_release_at = current_release_at
         self._style_fields()
 
+    @staticmethod
+    def _minute(value):
+        # The datetime-local input only carries minutes, so a resubmitted schedule compares at that precision.
+        return value.replace(second=0, microsecond=0) if value else None
+
+    def clean_release_at(self):
+        release_at = self.cleaned_data.get("release_at")
+        if release_at and self._minute(release_at) != self._minute(self.current_release_at) and release_at <= timezone.now():
+            raise forms.ValidationError("Escolha uma data de liberação no futuro.")
+        return release_at
+
+    @property
+    def release_at_changed(self) -> bool:
+        return self._minute(self.cleaned_data.get("release_at")) != self._minute(self.current_release_at)
+
 
 class UnlockForm(StyledFormMixin, forms.Form):
     password = forms.CharField(
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+_EXC_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _ReportingListener(QueueListener):
+    def __init__(self, owner: QueueListenerHandler, *handlers) -> None:
+        super().__init__(owner.queue, *handlers, respect_handler_level=True)
+        self.owner = owner
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.owner.take_dropped()
+        if dropped:
+            report = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0, "Fila de logs cheia: %d linha(s) descartada(s)", (dropped,), None
+            )
+            report.dropped = dropped
+            super().handle(report)
+        super().handle(record)
+
+
+class QueueListenerHandler(QueueHandler):
+    """QueueHandler that owns its listener, so request threads only pay for formatting the message and a put_nowait."""
+
+    def __init__(self, handlers, queue_size: int = 10000) -> None:
+        self.queue_size = queue_size
+        # dictConfig only resolves "cfg://" references on item access, not on iteration.
+        self.targets = [handlers[index] for index in range(len(handlers))]
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self._start_listener()
+        atexit.register(self._stop_listener)
+        # gunicorn preloads the app and forks: threads do not survive, so each worker starts its own listener.
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _start_listener(self) -> None:
+        self.listener = _ReportingListener(self, *self.targets)
+        self.listener.start()
+
+    def _stop_listener(self) -> None:
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def _restart_after_fork(self) -> None:
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._start_listener()
+
+    def take_dropped(self) -> int:
+        if not self.dropped:
+            return 0
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like the stdlib QueueHandler, render in the calling thread: args (model instances, querysets, requests)
+        # must not be evaluated later on the listener thread, and traceback frames must not stay alive in the queue.
+        # The traceback is kept as exc_text so JsonFormatter still emits it under "exc".
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_") and not isinstance(value, _PLAIN_TYPES):
+                setattr(record, key, str(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Under a burst we shed log lines instead of blocking the request thread; the listener reports the count.
+            with self._dropped_lock:
+                self.dropped += 1
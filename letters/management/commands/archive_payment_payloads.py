@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from letters.retention import archive_payment_payloads
+
+
+class Command(BaseCommand):
+    help = "Move o raw_payload de pagamentos antigos para a tabela fria comprimida."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.PAYMENT_PAYLOAD_ARCHIVE_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = archive_payment_payloads(
+            days=options["days"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
+        prefix = "[dry-run] " if result.dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{result.payments} payload(s) arquivado(s); "
+                f"{result.raw_bytes / 1024:.1f} KB -> {result.compressed_bytes / 1024:.1f} KB comprimidos."
+            )
+        )
@@ -0,0 +1,72 @@
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from letters.blobs import HASH_CHUNK_SIZE, delete_files
+from letters.models import LoveLetter, LovePhoto, PhotoBlob
+from letters.read_models import refresh_letter_snapshot
+from letters.storage import photo_storage
+
+
+class Command(BaseCommand):
+    help = "Associa fotos antigas a blobs por hash de conteudo e apaga as copias duplicadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def _digest(self, storage, name: str) -> tuple[str, int] | None:
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with storage.open(name, "rb") as handle:
+                for chunk in handle.chunks(HASH_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    size += len(chunk)
+        except OSError:
+            return None
+        return hasher.hexdigest(), size
+
+    def handle(self, *args, **options):
+        storage = photo_storage()
+        linked = missing = duplicates = reclaimed = 0
+        seen: dict[str, str] = {}
+        photos = LovePhoto.objects.filter(blob__isnull=True).exclude(image="").order_by("id")
+        for photo_id, letter_id, name in photos.values_list("id", "letter_id", "image").iterator(chunk_size=500):
+            digest = self._digest(storage, name)
+            if digest is None:
+                missing += 1
+                continue
+            sha256, size = digest
+            if options["dry_run"]:
+                canonical = seen.setdefault(sha256, PhotoBlob.objects.filter(sha256=sha256).values_list("name", flat=True).first() or name)
+                if canonical != name:
+                    duplicates += 1
+                    reclaimed += size
+                linked += 1
+                continue
+
+            with transaction.atomic():
+                blob, _ = PhotoBlob.objects.select_for_update().get_or_create(sha256=sha256, defaults={"name": name, "size": size})
+                PhotoBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+                LovePhoto.objects.filter(pk=photo_id).update(blob=blob, image=blob.name)
+                orphaned = blob.name != name and not LovePhoto.objects.filter(image=name).exists()
+            linked += 1
+            if blob.name != name:
+                # update() skips post_save; the snapshot must stop naming the duplicate before its file goes away.
+                letter = LoveLetter.objects.filter(pk=letter_id, snapshot__isnull=False).prefetch_related("photos").first()
+                if letter is not None:
+                    refresh_letter_snapshot(letter)
+            if orphaned:
+                delete_files([name])
+                duplicates += 1
+                reclaimed += size
+
+        prefix = "[dry-run] " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{linked} foto(s) associadas, {duplicates} copia(s) duplicadas removidas, "
+                f"{missing} arquivo(s) ausentes, {reclaimed / (1024 * 1024):.2f} MB liberados."
+            )
+        )
@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = "Compara a latencia de uma consulta com conexao nova por requisicao versus conexao do pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("O benchmark exige PostgreSQL (DATABASE_URL).")
+        import psycopg
+        from psycopg_pool import ConnectionPool
+
+        params = connection.get_connection_params()
+        total = options["requests"]
+
+        def direct() -> None:
+            with psycopg.connect(**params) as conn:
+                conn.execute("SELECT 1").fetchone()
+
+        with ConnectionPool(kwargs=params, min_size=1, max_size=1, open=True) as pool:
+            pool.wait()
+
+            def pooled() -> None:
+                with pool.connection() as conn:
+                    conn.execute("SELECT 1").fetchone()
+
+            results = {"conexao nova": self._measure(direct, total), "pool": self._measure(pooled, total)}
+
+        for label, samples in results.items():
+            self.stdout.write(
+                f"{label:>13}: media {statistics.mean(samples):7.2f} ms | "
+                f"p50 {statistics.median(samples):7.2f} ms | p95 {self._p95(samples):7.2f} ms"
+            )
+        saved = statistics.mean(results["conexao nova"]) - statistics.mean(results["pool"])
+        self.stdout.write(self.style.SUCCESS(f"Setup de conexao removido por requisicao: {saved:.2f} ms"))
+
+    @staticmethod
+    def _measure(func, total: int) -> list[float]:
+        samples = []
+        for _ in range(total):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    @staticmethod
+    def _p95(samples: list[float]) -> float:
+        return sorted(samples)[max(int(len(samples) * 0.95) - 1, 0)]
@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from letters.models import LoveLetter
+from letters.search import search_letters
+
+WORDS = (
+    "amor saudade coracao vida sempre juntos sorriso abraco beijo lua estrela mar praia viagem "
+    "casamento aniversario namoro primeira vez saudades carinho eterno paixao sonho destino"
+).split()
+NAMES = ["Ana", "Joao", "Maria", "Pedro", "Julia", "Lucas", "Beatriz", "Rafael", "Camila", "Gabriel"]
+QUERIES = ["amor", "saudade eterno", "Maria", "praia viagem", "aniversario", "bea", "sonho destino lua"]
+
+
+class Command(BaseCommand):
+    help = "Popula um usuario de benchmark com N cartas e mede a latencia da busca."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--letters", type=int, default=100_000)
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--keep", action="store_true", help="Mantem os dados gerados ao final.")
+
+    def handle(self, *args, **options):
+        user, _ = get_user_model().objects.get_or_create(username="bench-search")
+        existing = LoveLetter.objects.filter(user=user).count()
+        missing = max(options["letters"] - existing, 0)
+        rng = random.Random(42)
+        for start in range(0, missing, 5000):
+            batch = [
+                LoveLetter(
+                    user=user,
+                    beloved_name=rng.choice(NAMES),
+                    sender_name=rng.choice(NAMES),
+                    message=" ".join(rng.choices(WORDS, k=40)),
+                )
+                for _ in range(min(5000, missing - start))
+            ]
+            with transaction.atomic():
+                LoveLetter.objects.bulk_create(batch, batch_size=1000)
+        self.stdout.write(f"{LoveLetter.objects.filter(user=user).count()} cartas no usuario de benchmark.")
+
+        try:
+            for query in QUERIES:
+                samples = []
+                total = 0
+                for _ in range(options["runs"]):
+                    started = time.perf_counter()
+                    results = search_letters(user, query)
+                    total = results.count()
+                    list(results[0:20])
+                    samples.append((time.perf_counter() - started) * 1000)
+                samples.sort()
+                self.stdout.write(
+                    f"{query!r:>22}: {total:>7} resultados | p50 {statistics.median(samples):7.2f} ms | "
+                    f"p95 {samples[max(int(len(samples) * 0.95) - 1, 0)]:7.2f} ms"
+                )
+        finally:
+            if not options["keep"]:
+                LoveLetter.objects.filter(user=user).delete()
+                user.delete()
@@ -0,0 +1,134 @@
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = [
+    "CREATE TABLE letter (id INTEGER PRIMARY KEY, message TEXT NOT NULL, is_paid INTEGER NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE payment (id INTEGER PRIMARY KEY, letter_id INTEGER NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE INDEX payment_letter ON payment (letter_id)",
+]
+
+
+class Command(BaseCommand):
+    help = "Compara escritas concorrentes no SQLite com a configuracao padrao do Django e com o perfil de producao."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--letters", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        profiles = {
+            # Django without OPTIONS: rollback journal, sqlite3's 5 s timeout, deferred BEGIN.
+            "padrao": {"timeout": 5.0, "pragmas": [], "begin": "BEGIN"},
+            "producao": {
+                "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+                "pragmas": settings.SQLITE_PRAGMAS,
+                "begin": "BEGIN IMMEDIATE",
+            },
+        }
+        self.stdout.write(
+            f"{options['threads']} threads, {options['seconds']:.0f}s por perfil, {options['letters']} cartas "
+            "(60% edicao do wizard, 20% webhook, 20% leitura)"
+        )
+        for label, profile in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / "bench.sqlite3"
+                self._seed(path, profile, options["letters"])
+                result = self._run(path, profile, options)
+            latencies = result["latencies"] or [0.0]
+            self.stdout.write(
+                f"{label:>9}: {result['ops'] / options['seconds']:8.0f} ops/s | "
+                f"'database is locked' {result['locked']:5d} | "
+                f"p50 {statistics.median(latencies):6.2f} ms | p95 {self._p95(latencies):7.2f} ms"
+            )
+
+    def _connect(self, path: Path, profile: dict) -> sqlite3.Connection:
+        # Autocommit at the driver level, like Django; transactions are opened explicitly below.
+        conn = sqlite3.connect(path, timeout=profile["timeout"], isolation_level=None, check_same_thread=False)
+        for pragma in profile["pragmas"]:
+            conn.execute(pragma)
+        return conn
+
+    def _seed(self, path: Path, profile: dict, letters: int) -> None:
+        conn = self._connect(path, profile)
+        for statement in SCHEMA:
+            conn.execute(statement)
+        now = time.time()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO letter (id, message, is_paid, updated_at) VALUES (?, ?, 0, ?)",
+            [(index, "x" * 400, now) for index in range(1, letters + 1)],
+        )
+        conn.executemany(
+            "INSERT INTO payment (letter_id, status, updated_at) VALUES (?, 'pending', ?)",
+            [(index, now) for index in range(1, letters + 1)],
+        )
+        conn.execute("COMMIT")
+        conn.close()
+
+    def _run(self, path: Path, profile: dict, options: dict) -> dict:
+        result = {"ops": 0, "locked": 0, "latencies": []}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options["seconds"]
+
+        def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            conn = self._connect(path, profile)
+            ops = locked = 0
+            latencies = []
+            while time.monotonic() < deadline:
+                letter_id = rng.randint(1, options["letters"])
+                roll = rng.random()
+                started = time.perf_counter()
+                try:
+                    if roll < 0.6:
+                        # Wizard step: read the letter, then save the edited message.
+                        conn.execute(profile["begin"])
+                        message = conn.execute("SELECT message FROM letter WHERE id = ?", (letter_id,)).fetchone()[0]
+                        conn.execute(
+                            "UPDATE letter SET message = ?, updated_at = ? WHERE id = ?",
+                            (message[::-1], time.time(), letter_id),
+                        )
+                        conn.execute("COMMIT")
+                    elif roll < 0.8:
+                        # Webhook: mark the payment and the letter as paid together.
+                        conn.execute(profile["begin"])
+                        conn.execute("SELECT is_paid FROM letter WHERE id = ?", (letter_id,)).fetchone()
+                        conn.execute("UPDATE payment SET status = 'paid', updated_at = ? WHERE letter_id = ?", (time.time(), letter_id))
+                        conn.execute("UPDATE letter SET is_paid = 1, updated_at = ? WHERE id = ?", (time.time(), letter_id))
+                        conn.execute("COMMIT")
+                    else:
+                        conn.execute("SELECT message, is_paid FROM letter WHERE id = ?", (letter_id,)).fetchone()
+                except sqlite3.OperationalError as exc:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    if "locked" not in str(exc):
+                        raise
+                    locked += 1
+                    continue
+                ops += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+            conn.close()
+            with lock:
+                result["ops"] += ops
+                result["locked"] += locked
+                result["latencies"].extend(latencies)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    @staticmethod
+    def _p95(samples: list[float]) -> float:
+        return sorted(samples)[max(int(len(samples) * 0.95) - 1, 0)]
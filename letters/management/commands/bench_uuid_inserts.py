@@ -0,0 +1,73 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from letters.utils import uuid7
+
+GENERATORS = {"v4": uuid.uuid4, "v7": uuid7}
+
+
+class Command(BaseCommand):
+    help = "Compara a vazao de INSERT com chaves UUIDv4 e UUIDv7 numa tabela com indice de PK e de FK."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500_000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def _create_tables(self, cursor, name: str) -> None:
+        id_type = "uuid" if connection.vendor == "postgresql" else "char(32)"
+        # Mirrors LoveLetter plus a child table whose FK index is hit by the same keys (LovePhoto/PaymentRecord).
+        cursor.execute(f"CREATE TABLE bench_{name}_letter (id {id_type} PRIMARY KEY, message text NOT NULL)")
+        cursor.execute(f"CREATE TABLE bench_{name}_child (id bigint PRIMARY KEY, letter_id {id_type} NOT NULL)")
+        cursor.execute(f"CREATE INDEX bench_{name}_child_letter_idx ON bench_{name}_child (letter_id)")
+
+    def _drop_tables(self, cursor, name: str) -> None:
+        cursor.execute(f"DROP TABLE IF EXISTS bench_{name}_child")
+        cursor.execute(f"DROP TABLE IF EXISTS bench_{name}_letter")
+
+    def _index_sizes(self, cursor, name: str) -> str:
+        if connection.vendor != "postgresql":
+            return ""
+        cursor.execute(
+            "SELECT pg_relation_size(%s), pg_relation_size(%s)",
+            [f"bench_{name}_letter_pkey", f"bench_{name}_child_letter_idx"],
+        )
+        pkey, child = cursor.fetchone()
+        return f" | PK {pkey / 1024 / 1024:.1f} MB, FK {child / 1024 / 1024:.1f} MB"
+
+    def _run(self, name: str, rows: int, batch_size: int) -> None:
+        generate = GENERATORS[name]
+        convert = (lambda value: value) if connection.vendor == "postgresql" else (lambda value: value.hex)
+        batch_times = []
+        with connection.cursor() as cursor:
+            self._drop_tables(cursor, name)
+            self._create_tables(cursor, name)
+            child_id = 0
+            for start in range(0, rows, batch_size):
+                ids = [convert(generate()) for _ in range(min(batch_size, rows - start))]
+                children = []
+                for letter_id in ids:
+                    child_id += 1
+                    children.append((child_id, letter_id))
+                started = time.perf_counter()
+                with transaction.atomic():
+                    cursor.executemany(f"INSERT INTO bench_{name}_letter (id, message) VALUES (%s, 'x')", [(i,) for i in ids])
+                    cursor.executemany(f"INSERT INTO bench_{name}_child (id, letter_id) VALUES (%s, %s)", children)
+                batch_times.append((len(ids), time.perf_counter() - started))
+
+            total = sum(elapsed for _, elapsed in batch_times)
+            tail = batch_times[-max(len(batch_times) // 10, 1) :]
+            tail_rate = sum(count for count, _ in tail) / sum(elapsed for _, elapsed in tail)
+            sizes = self._index_sizes(cursor, name)
+            self._drop_tables(cursor, name)
+        self.stdout.write(f"{name}: {rows / total:>10.0f} linhas/s no total | {tail_rate:>10.0f} linhas/s nos ultimos 10%{sizes}")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write("Aviso: o efeito de localidade no indice aparece de verdade no PostgreSQL; rodando mesmo assim.")
+        if options["rows"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("--rows e --batch-size devem ser positivos.")
+        for name in GENERATORS:
+            self._run(name, options["rows"], options["batch_size"])
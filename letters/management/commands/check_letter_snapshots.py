@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from letters.models import LetterSnapshot, LoveLetter
+from letters.read_models import SNAPSHOT_VERSION, build_letter_snapshot, refresh_letter_snapshot
+
+
+class Command(BaseCommand):
+    help = "Confere os snapshots de leitura das cartas contra as tabelas normalizadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Reconstroi os snapshots divergentes.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        checked = 0
+        broken = 0
+        letters = LoveLetter.objects.select_related("snapshot").prefetch_related("photos").order_by("pk")
+        for letter in letters.iterator(chunk_size=options["chunk_size"]):
+            checked += 1
+            try:
+                snapshot = letter.snapshot
+            except LetterSnapshot.DoesNotExist:
+                snapshot = None
+            if snapshot is None:
+                reason = "ausente"
+            elif snapshot.version != SNAPSHOT_VERSION:
+                reason = f"versao {snapshot.version}"
+            elif snapshot.data != build_letter_snapshot(letter):
+                reason = "divergente"
+            else:
+                continue
+            broken += 1
+            self.stdout.write(f"{letter.pk}: {reason}")
+            if options["fix"]:
+                refresh_letter_snapshot(letter)
+
+        self.stdout.write(f"{checked} carta(s) conferidas, {broken} com problema.")
+        if broken and not options["fix"]:
+            raise CommandError("Snapshots inconsistentes; rode novamente com --fix.")
@@ -0,0 +1,140 @@
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from letters.counters import view_counters
+from letters.models import LetterStats, LoveLetter, LovePhoto, PaymentRecord
+from letters.query_budgets import QUERY_BUDGETS, budget_for, capture_queries, describe_overrun
+
+SEED_LETTERS = 25
+SEED_PHOTOS = 3
+
+
+class Command(BaseCommand):
+    help = "Exercita cada rota com dados de exemplo e confere o orcamento de queries de QUERY_BUDGETS."
+
+    def _seed(self):
+        User = get_user_model()
+        owner = User.objects.create_user(username="budget-owner", email="owner@example.com", password="budget-pass")
+        staff = User.objects.create_user(username="budget-staff", password="budget-pass", is_staff=True)
+        letters = []
+        for index in range(SEED_LETTERS):
+            letter = LoveLetter.objects.create(
+                user=owner,
+                beloved_name=f"Amor {index}",
+                sender_name="Remetente",
+                message="Uma mensagem de amor " * 10,
+                is_paid=index % 2 == 0,
+                paid_at=timezone.now() if index % 2 == 0 else None,
+            )
+            for photo_index in range(SEED_PHOTOS):
+                LovePhoto.objects.create(letter=letter, image=f"letters/photos/budget-{index}-{photo_index}.jpg")
+            PaymentRecord.objects.create(letter=letter, method="pix", status="paid" if letter.is_paid else "pending")
+            LetterStats.objects.create(letter=letter, views=index, opens=index, first_opened_at=timezone.now())
+            letters.append(letter)
+        paid = letters[0]
+        protected = letters[2]
+        protected.password_hash = make_password("segredo")
+        protected.save(update_fields=["password_hash", "updated_at"])
+        scheduled = letters[4]
+        scheduled.release_at = timezone.now() + timedelta(days=1)
+        scheduled.save(update_fields=["release_at", "updated_at"])
+        return owner, staff, paid, protected, scheduled, letters[1]
+
+    def _routes(self, paid, protected, scheduled, draft):
+        def letter_url(name, letter):
+            return reverse(name, kwargs={"letter_id": str(letter.id)})
+
+        # (label, url, client) where client is "owner", "staff" or "anonymous".
+        routes = [
+            ("home", reverse("letters:home"), "anonymous"),
+            ("health", reverse("letters:health"), "anonymous"),
+            ("db_pool_health", reverse("letters:db_pool_health"), "staff"),
+            ("history", reverse("letters:history"), "owner"),
+            ("history ?q=", reverse("letters:history") + "?q=amor", "owner"),
+            ("bulk_import", reverse("letters:bulk_import"), "owner"),
+            ("export_data", reverse("letters:export_data"), "owner"),
+            ("profile", reverse("letters:profile"), "owner"),
+            ("edit_letter", letter_url("letters:edit_letter", paid), "owner"),
+            ("preview", letter_url("letters:preview", paid), "owner"),
+            ("payment (pago)", letter_url("letters:payment", paid), "owner"),
+            ("payment (rascunho)", letter_url("letters:payment", draft), "owner"),
+            ("public_letter", letter_url("letters:public_letter", paid), "anonymous"),
+            ("public_letter (senha)", letter_url("letters:public_letter", protected), "anonymous"),
+            ("public_letter (agendada)", letter_url("letters:public_letter", scheduled), "anonymous"),
+            ("unlock_letter", letter_url("letters:unlock_letter", protected), "anonymous"),
+            ("letter_qr", letter_url("letters:letter_qr", paid), "anonymous"),
+        ]
+        routes += [
+            (f"create_step {step}", reverse("letters:create_step", kwargs={"step": step}), "owner") for step in range(1, 7)
+        ]
+        return routes
+
+    def _check_routes(self):
+        failures = []
+        exercised = set()
+        owner, staff, paid, protected, scheduled, draft = self._seed()
+        clients = {"anonymous": Client(), "owner": Client(), "staff": Client()}
+        clients["owner"].force_login(owner)
+        clients["staff"].force_login(staff)
+        session = clients["owner"].session
+        session["current_letter_id"] = str(draft.id)
+        session.save()
+
+        for label, url, client_name in self._routes(paid, protected, scheduled, draft):
+            with capture_queries() as capture:
+                response = clients[client_name].get(url)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            view_name = response.resolver_match.view_name if response.resolver_match else None
+            exercised.add(view_name)
+            budget = budget_for(view_name)
+            ok = budget is not None and len(capture) <= budget
+            status = "ok" if ok else "SEM ORCAMENTO" if budget is None else "EXCEDEU"
+            self.stdout.write(f"{label:<26} {response.status_code:>3}  {len(capture):>3} / {budget if budget is not None else '-':>3}  {status}")
+            if not ok:
+                failures.append(describe_overrun(view_name or url, budget or 0, capture))
+        return failures, exercised
+
+    def handle(self, *args, **options):
+        # Everything runs in a throwaway test database and temporary directories, so the command never seeds the
+        # configured database and leaves no files behind (export_data writes a real ZIP).
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with tempfile.TemporaryDirectory() as scratch, override_settings(
+                MEDIA_ROOT=Path(scratch) / "media",
+                EXPORT_CACHE_DIR=Path(scratch) / "exports",
+                RESUMABLE_UPLOAD_DIR=Path(scratch) / "uploads",
+                STORAGES={**settings.STORAGES, "photos": {"BACKEND": "django.core.files.storage.FileSystemStorage"}},
+            ):
+                failures, exercised = self._check_routes()
+                view_counters.flush()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        unexercised = sorted(set(QUERY_BUDGETS) - exercised)
+        if unexercised:
+            self.stdout.write(f"Sem rota exercitada: {', '.join(unexercised)}")
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f"{len(failures)} rota(s) fora do orcamento de queries.")
+        self.stdout.write(self.style.SUCCESS("Todas as rotas dentro do orcamento."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from letters.search import check_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Confere o indice de busca das cartas (FTS5 no SQLite, GIN no Postgres) e o reconstroi se preciso."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Recria triggers ausentes e reconstroi o indice.")
+
+    def handle(self, *args, **options):
+        problems = check_search_index()
+        for problem in problems:
+            self.stdout.write(problem)
+        if not problems:
+            self.stdout.write(self.style.SUCCESS("Indice de busca consistente."))
+            return
+        if not options["fix"]:
+            raise CommandError("Indice de busca inconsistente; rode novamente com --fix.")
+        rebuild_search_index()
+        remaining = check_search_index()
+        if remaining:
+            raise CommandError(f"Indice ainda inconsistente apos reconstruir: {', '.join(remaining)}")
+        self.stdout.write(self.style.SUCCESS("Indice de busca reconstruido."))
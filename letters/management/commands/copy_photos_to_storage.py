@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files.storage import FileSystemStorage
+
+from letters.models import LovePhoto
+from letters.storage import copy_photos, photo_storage
+
+
+class Command(BaseCommand):
+    help = "Copia as fotos do disco local para o storage de fotos configurado, conferindo checksums."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+
+    def handle(self, *args, **options):
+        target = photo_storage()
+        if isinstance(target, FileSystemStorage):
+            raise CommandError("Configure PHOTO_STORAGE_BUCKET antes de copiar as fotos.")
+        names = list(LovePhoto.objects.exclude(image="").values_list("image", flat=True).distinct())
+        result = copy_photos(names, target, workers=options["workers"])
+        for name in result.missing:
+            self.stderr.write(f"Arquivo local ausente: {name}")
+        for name in result.mismatched:
+            self.stderr.write(f"Checksum divergente: {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.copied} foto(s) copiadas ({result.bytes_copied / (1024 * 1024):.2f} MB), "
+                f"{result.skipped} ja existentes, {len(result.missing)} ausentes, {len(result.mismatched)} divergentes."
+            )
+        )
+        if result.mismatched:
+            raise CommandError("Algumas fotos nao conferem com o original.")
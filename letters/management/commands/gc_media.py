@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from letters.retention import collect_orphaned_media
+
+
+class Command(BaseCommand):
+    help = "Remove arquivos de foto que nenhuma LovePhoto referencia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", default=str(settings.MEDIA_ROOT))
+        parser.add_argument("--prefix", default="letters/photos")
+        parser.add_argument("--grace-hours", type=int, default=24)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = collect_orphaned_media(
+            root=options["root"],
+            prefix=options["prefix"],
+            grace_hours=options["grace_hours"],
+            dry_run=options["dry_run"],
+        )
+        prefix = "[dry-run] " if result.dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{result.scanned} arquivo(s) lidos, {result.referenced} em uso, "
+                f"{result.protected} recentes protegidos, {result.orphans} orfao(s) removidos, "
+                f"{result.bytes_reclaimed / (1024 * 1024):.2f} MB liberados."
+            )
+        )
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from letters.archives import stream_zip
+from letters.bulk import FILE_READ_ERRORS, import_letters, iter_rows, public_links, qr_zip_entries
+
+
+class Command(BaseCommand):
+    help = "Cria cartas em lote a partir de um CSV/JSONL e grava um .zip com os QR codes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .csv, .jsonl ou .json com uma carta por linha.")
+        parser.add_argument("--user", required=True, help="Usuario dono das cartas.")
+        parser.add_argument("--output", default="cartas-qr.zip", help="Arquivo .zip de saida.")
+        parser.add_argument("--max-rows", type=int, default=None)
+        parser.add_argument("--workers", type=int, default=settings.BULK_QR_WORKERS, help="Processos para gerar os QR codes.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"Usuario {options['user']} nao encontrado.")
+
+        with open(options["path"], "rb") as stream:
+            try:
+                result = import_letters(user, iter_rows(stream, options["path"]), max_rows=options["max_rows"])
+            except FILE_READ_ERRORS as exc:
+                raise CommandError(f"Nao foi possivel ler o arquivo: {exc}") from exc
+        if result.errors:
+            for error in result.errors:
+                self.stderr.write(error)
+            raise CommandError(f"{len(result.errors)} erro(s); nenhuma carta criada.")
+
+        links = public_links(result.letters, settings.SITE_URL)
+        with open(options["output"], "wb") as output:
+            for chunk in stream_zip(qr_zip_entries(result.letters, links, workers=options["workers"])):
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"{len(result.letters)} carta(s) criadas; QR codes em {options['output']}."))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from letters.partitions import ensure_payment_partitions
+
+
+class Command(BaseCommand):
+    help = "Cria as particoes mensais de pagamentos e esvazia a particao DEFAULT nelas (somente Postgres)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=settings.PAYMENT_PARTITION_MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(f"Banco {connection.vendor}: pagamentos nao sao particionados; nada a fazer.")
+            return
+        created = ensure_payment_partitions(options["months_ahead"])
+        for name in created:
+            self.stdout.write(f"Criada {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} particao(oes) criada(s)."))
@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+DEFAULT_MODULES = [
+    "config.wsgi",
+    "letters.views",
+    "stripe",
+    "mercadopago",
+    "qrcode",
+    "PIL.Image",
+    "boto3",
+]
+
+# Runs in a fresh interpreter so each module is measured from a cold import.
+PROBE = """
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+import django
+django.setup()
+before_modules = set(sys.modules)
+before_rss = rss_kb()
+started = time.perf_counter()
+error = ""
+try:
+    __import__(sys.argv[1])
+except Exception as exc:
+    error = repr(exc)
+print(json.dumps({
+    "ms": (time.perf_counter() - started) * 1000,
+    "rss_kb": rss_kb() - before_rss,
+    "modules": len(set(sys.modules) - before_modules),
+    "error": error,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Mede tempo de import e RSS de cada modulo pesado num interpretador limpo (apos django.setup())."
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'modulo':<20} {'import (ms)':>12} {'RSS (KB)':>10} {'modulos':>8}")
+        for module in options["modules"]:
+            completed = subprocess.run(
+                [sys.executable, "-c", PROBE, module],
+                capture_output=True,
+                text=True,
+                cwd=settings.BASE_DIR,
+            )
+            if completed.returncode != 0:
+                self.stderr.write(f"{module}: falhou\n{completed.stderr.strip()}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            line = f"{module:<20} {result['ms']:>12.1f} {result['rss_kb']:>10} {result['modules']:>8}"
+            if result["error"]:
+                line += f"  ({result['error']})"
+            self.stdout.write(line)
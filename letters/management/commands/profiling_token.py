@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from letters.profiling import sign_profiling_token
+
+
+class Command(BaseCommand):
+    help = "Gera um token assinado para perfilar requisicoes via X-Profile-Token ou ?_profile=."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Usuario staff dono do token.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["username"], is_staff=True, is_active=True).first()
+        if user is None:
+            raise CommandError(f"Usuario staff {options['username']} nao encontrado.")
+        token = sign_profiling_token(user)
+        minutes = settings.PROFILING_TOKEN_MAX_AGE // 60
+        self.stdout.write(token)
+        self.stdout.write(f"Valido por {minutes} min. Use o cabecalho X-Profile-Token: {token} ou ?_profile={token}.")
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from letters.retention import purge_abandoned_drafts
+
+
+class Command(BaseCommand):
+    help = "Remove cartas nao pagas mais antigas que N dias, junto com as fotos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.DRAFT_RETENTION_DAYS)
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = purge_abandoned_drafts(
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            dry_run=options["dry_run"],
+        )
+        prefix = "[dry-run] " if result.dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{result.letters} carta(s), {result.photos} foto(s), {result.payments} pagamento(s); "
+                f"{result.files} arquivo(s), {result.bytes_reclaimed / (1024 * 1024):.2f} MB liberados."
+            )
+        )
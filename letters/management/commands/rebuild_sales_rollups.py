@@ -0,0 +1,23 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from letters.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula os agregados diarios de vendas a partir de cartas e pagamentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Primeiro dia a recalcular (AAAA-MM-DD); sem ele, recalcula tudo.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError as exc:
+                raise CommandError("--since deve estar no formato AAAA-MM-DD.") from exc
+        rows = rebuild_rollups(since)
+        scope = f"desde {since:%d/%m/%Y}" if since else "todo o historico"
+        self.stdout.write(self.style.SUCCESS(f"{rows} linha(s) de agregados gravadas ({scope})."))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from letters.release import next_release_at, release_due_letters
+
+
+class Command(BaseCommand):
+    help = "Libera as cartas agendadas no horario e avisa quem enviou."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Processa as cartas vencidas uma vez e sai.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-sleep", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_due_letters(batch_size=options["batch_size"])
+            if released:
+                self.stdout.write(f"{released} carta(s) liberadas.")
+            if released >= options["batch_size"]:
+                continue
+            if options["once"]:
+                return
+            # Sleep until the next scheduled release instead of polling the table.
+            next_at = next_release_at()
+            delay = options["max_sleep"]
+            if next_at is not None:
+                delay = min(delay, max((next_at - timezone.now()).total_seconds(), 0))
+            time.sleep(delay)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from letters.blobs import rename_photos_by_hash
+
+
+class Command(BaseCommand):
+    help = "Renomeia as fotos para nomes derivados do hash do conteudo e atualiza as linhas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = rename_photos_by_hash(
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            dry_run=options["dry_run"],
+        )
+        for name in result.missing:
+            self.stderr.write(f"Arquivo ausente: {name}")
+        if result.unlinked:
+            self.stdout.write(
+                self.style.WARNING(f"{result.unlinked} foto(s) sem blob mantem o nome antigo; rode backfill_photo_blobs antes.")
+            )
+        prefix = "[dry-run] " if result.dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{result.renamed} arquivo(s) renomeado(s) ({result.photos} foto(s)), "
+                f"{result.skipped} ja com hash, {len(result.missing)} ausente(s)."
+            )
+        )
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from letters.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Envia os emails pendentes do outbox, reaproveitando uma conexao SMTP por lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Esvazia a fila uma vez e sai.")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=settings.OUTBOX_POLL_SECONDS)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain(options["batch_size"])
+            if sent or failed or options["once"]:
+                self.stdout.write(f"{sent} email(s) enviados, {failed} com falha.")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,104 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import add_never_cache_headers
+
+from .profiling import TOKEN_HEADER, TOKEN_PARAM, new_profiler, profiler_lock, profiling_user, save_profile
+from .query_budgets import QueryBudgetExceeded, budget_for, capture_queries, describe_overrun
+
+logger = logging.getLogger("letters.requests")
+
+
+class RequestLogMiddleware:
+    """Logs one structured line per request: always for errors and slow requests, sampled otherwise."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        slow = duration_ms >= settings.LOG_SLOW_REQUEST_MS
+        if response.status_code < 400 and not slow and random.random() >= settings.LOG_REQUEST_SAMPLE_RATE:
+            return response
+
+        match = getattr(request, "resolver_match", None)
+        level = logging.ERROR if response.status_code >= 500 else logging.WARNING if slow else logging.INFO
+        logger.log(
+            level,
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "route": match.view_name if match else None,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 1),
+                "slow": slow,
+                "sampled": response.status_code < 400 and not slow,
+                "user_id": getattr(getattr(request, "user", None), "pk", None),
+            },
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Profiles a single request when it carries a signed staff token; otherwise only two dict lookups."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if TOKEN_HEADER not in request.META and f"{TOKEN_PARAM}=" not in request.META.get("QUERY_STRING", ""):
+            return self.get_response(request)
+        return self._profiled(request)
+
+    def _profiled(self, request):
+        user = profiling_user(request.META.get(TOKEN_HEADER) or request.GET.get(TOKEN_PARAM, ""))
+        if user is None or not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profiler = new_profiler()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration_ms = (time.perf_counter() - started) * 1000
+            record = save_profile(profiler, request=request, response=response, duration_ms=duration_ms, user=user)
+        finally:
+            profiler_lock.release()
+        response["X-Profile-Id"] = str(record.pk)
+        add_never_cache_headers(response)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Checks each request against QUERY_BUDGETS in dev; removed from the stack when QUERY_BUDGET_MODE is off."""
+
+    def __init__(self, get_response):
+        if settings.QUERY_BUDGET_MODE not in {"log", "raise"}:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_queries() as capture:
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else None
+        budget = budget_for(view_name)
+        if budget is None or len(capture) <= budget:
+            return response
+        message = describe_overrun(view_name, budget, capture)
+        if settings.QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        logging.getLogger("letters.query_budgets").warning(message)
+        return response
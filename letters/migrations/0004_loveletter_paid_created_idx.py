@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0003_lovephoto_display_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loveletter',
+            index=models.Index(fields=['is_paid', 'created_at'], name='letters_paid_created_idx'),
+        ),
+    ]
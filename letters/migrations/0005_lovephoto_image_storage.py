@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:06
+
+import letters.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0004_loveletter_paid_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lovephoto',
+            name='image',
+            field=models.ImageField(storage=letters.storage.photo_storage, upload_to='letters/photos/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0005_lovephoto_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LetterSnapshot',
+            fields=[
+                ('letter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='letters.loveletter')),
+                ('version', models.PositiveSmallIntegerField(default=1)),
+                ('data', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0007_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LetterStats',
+            fields=[
+                ('letter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='letters.loveletter')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('opens', models.PositiveIntegerField(default=0)),
+                ('first_opened_at', models.DateTimeField(blank=True, null=True)),
+                ('last_opened_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0008_letterstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loveletter',
+            name='release_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loveletter',
+            name='release_processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='loveletter',
+            index=models.Index(condition=models.Q(('release_at__isnull', False), ('release_processed_at__isnull', True)), fields=['release_at'], name='letters_release_due_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+# The SQL is frozen here on purpose: letters/search.py may evolve, but this migration must keep doing exactly what it
+# did when it was first applied.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE letters_loveletter ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(beloved_name, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(beloved_nickname, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(sender_name, '')), 'B') ||
+        setweight(to_tsvector('portuguese', coalesce(message, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX letters_loveletter_search_idx ON letters_loveletter USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS letters_loveletter_search_idx",
+    "ALTER TABLE letters_loveletter DROP COLUMN IF EXISTS search_vector",
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE letters_loveletter_fts USING fts5(beloved_name, beloved_nickname, sender_name, message, "
+    "content='letters_loveletter', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    """CREATE TRIGGER letters_loveletter_fts_ai AFTER INSERT ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(rowid, beloved_name, beloved_nickname, sender_name, message)
+        VALUES (new.rowid, new.beloved_name, new.beloved_nickname, new.sender_name, new.message);
+    END""",
+    """CREATE TRIGGER letters_loveletter_fts_ad AFTER DELETE ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(letters_loveletter_fts, rowid, beloved_name, beloved_nickname, sender_name, message)
+        VALUES ('delete', old.rowid, old.beloved_name, old.beloved_nickname, old.sender_name, old.message);
+    END""",
+    """CREATE TRIGGER letters_loveletter_fts_au AFTER UPDATE ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(letters_loveletter_fts, rowid, beloved_name, beloved_nickname, sender_name, message)
+        VALUES ('delete', old.rowid, old.beloved_name, old.beloved_nickname, old.sender_name, old.message);
+        INSERT INTO letters_loveletter_fts(rowid, beloved_name, beloved_nickname, sender_name, message)
+        VALUES (new.rowid, new.beloved_name, new.beloved_nickname, new.sender_name, new.message);
+    END""",
+    "INSERT INTO letters_loveletter_fts(letters_loveletter_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_ai",
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_ad",
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_au",
+    "DROP TABLE IF EXISTS letters_loveletter_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0009_loveletter_release_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:33
+
+import letters.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0013_requestprofile'),
+    ]
+
+    # Only the Python-side default changes. A database operation would make SQLite rebuild the table
+    # (dropping the full-text search triggers) for no schema change at all.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='loveletter',
+                    name='id',
+                    field=models.UUIDField(default=letters.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,154 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:37
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Everything below is frozen with the migration; letters/partitions.py only handles the monthly upkeep afterwards.
+INITIAL_MONTHS_AHEAD = 3
+COLUMNS = "id, letter_id, method, provider_payment_id, amount, status, raw_payload, created_at, updated_at"
+
+PARTITIONED_TABLE = """
+CREATE TABLE letters_paymentrecord (
+    id bigint NOT NULL DEFAULT nextval('letters_paymentrecord_part_id_seq'),
+    letter_id uuid NOT NULL,
+    method varchar(20) NOT NULL,
+    provider_payment_id varchar(120) NOT NULL,
+    amount numeric(6, 2) NOT NULL,
+    status varchar(20) NOT NULL,
+    raw_payload jsonb NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+PLAIN_TABLE = """
+CREATE TABLE letters_paymentrecord (
+    id bigint NOT NULL GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    letter_id uuid NOT NULL,
+    method varchar(20) NOT NULL,
+    provider_payment_id varchar(120) NOT NULL,
+    amount numeric(6, 2) NOT NULL,
+    status varchar(20) NOT NULL,
+    raw_payload jsonb NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL
+)
+"""
+
+LETTER_FK = (
+    "ALTER TABLE letters_paymentrecord ADD CONSTRAINT letters_paymentrecord_letter_id_fk "
+    "FOREIGN KEY (letter_id) REFERENCES letters_loveletter (id) DEFERRABLE INITIALLY DEFERRED"
+)
+LETTER_INDEX = "CREATE INDEX letters_paymentrecord_letter_id_idx ON letters_paymentrecord (letter_id)"
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_partition(month):
+    upper = _add_months(month, 1)
+    return (
+        f"CREATE TABLE letters_paymentrecord_p{month:%Y%m} PARTITION OF letters_paymentrecord "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+    )
+
+
+def _is_partitioned(cursor):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'letters_paymentrecord')"
+    )
+    return cursor.fetchone()[0]
+
+
+def partition_payments(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            return
+        cursor.execute("SELECT date_trunc('month', min(created_at) AT TIME ZONE 'UTC')::date FROM letters_paymentrecord")
+        oldest = cursor.fetchone()[0]
+
+    now = timezone.now()
+    month = oldest or date(now.year, now.month, 1)
+    last_month = _add_months(date(now.year, now.month, 1), INITIAL_MONTHS_AHEAD)
+    months = []
+    while month <= last_month:
+        months.append(month)
+        month = _add_months(month, 1)
+
+    statements = [
+        "ALTER TABLE letters_paymentrecord RENAME TO letters_paymentrecord_legacy",
+        "ALTER TABLE letters_paymentrecord_legacy RENAME CONSTRAINT letters_paymentrecord_pkey TO letters_paymentrecord_legacy_pkey",
+        "CREATE SEQUENCE letters_paymentrecord_part_id_seq",
+        PARTITIONED_TABLE,
+        "ALTER SEQUENCE letters_paymentrecord_part_id_seq OWNED BY letters_paymentrecord.id",
+        # Safety net for rows outside the managed months; payment_partitions drains it into real partitions.
+        "CREATE TABLE letters_paymentrecord_default PARTITION OF letters_paymentrecord DEFAULT",
+        *[_month_partition(month) for month in months],
+        f"INSERT INTO letters_paymentrecord ({COLUMNS}) SELECT {COLUMNS} FROM letters_paymentrecord_legacy",
+        "SELECT setval('letters_paymentrecord_part_id_seq', COALESCE((SELECT max(id) FROM letters_paymentrecord), 0) + 1, false)",
+        "DROP TABLE letters_paymentrecord_legacy",
+        LETTER_INDEX,
+        # Last: a deferred FK added before the copy leaves pending trigger events, and PostgreSQL then refuses
+        # CREATE INDEX in the same transaction. Added here, it validates the copied rows at once.
+        LETTER_FK,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def unpartition_payments(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            return
+    statements = [
+        "ALTER TABLE letters_paymentrecord RENAME TO letters_paymentrecord_partitioned",
+        "ALTER TABLE letters_paymentrecord_partitioned RENAME CONSTRAINT letters_paymentrecord_pkey TO letters_paymentrecord_partitioned_pkey",
+        "ALTER TABLE letters_paymentrecord_partitioned DROP CONSTRAINT letters_paymentrecord_letter_id_fk",
+        "DROP INDEX IF EXISTS letters_paymentrecord_letter_id_idx",
+        PLAIN_TABLE,
+        f"INSERT INTO letters_paymentrecord ({COLUMNS}) OVERRIDING SYSTEM VALUE SELECT {COLUMNS} FROM letters_paymentrecord_partitioned",
+        "SELECT setval(pg_get_serial_sequence('letters_paymentrecord', 'id'), "
+        "COALESCE((SELECT max(id) FROM letters_paymentrecord), 0) + 1, false)",
+        "DROP TABLE letters_paymentrecord_partitioned",
+        LETTER_INDEX,
+        LETTER_FK,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0014_loveletter_uuid7'),
+    ]
+
+    # Postgres only: the table is rebuilt as range partitions on created_at. The index is added afterwards so
+    # it is created on the partitioned parent and cascades to every partition.
+    operations = [
+        migrations.RunPython(partition_payments, unpartition_payments),
+        migrations.CreateModel(
+            name='PaymentPayloadArchive',
+            fields=[
+                ('payment_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('letter_id', models.UUIDField(db_index=True)),
+                ('payment_created_at', models.DateTimeField()),
+                ('payload', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='paymentrecord',
+            index=models.Index(fields=['provider_payment_id'], name='letters_payment_provider_idx'),
+        ),
+    ]
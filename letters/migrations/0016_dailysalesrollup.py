@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:41
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0015_paymentrecord_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('method', models.CharField(blank=True, max_length=20)),
+                ('letters_created', models.PositiveIntegerField(default=0)),
+                ('letters_paid', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12)),
+                ('payments_started', models.PositiveIntegerField(default=0)),
+                ('payments_paid', models.PositiveIntegerField(default=0)),
+                ('payments_failed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day', 'method'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'method'), name='letters_rollup_day_method_uniq')],
+            },
+        ),
+    ]
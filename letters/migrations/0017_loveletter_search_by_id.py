@@ -0,0 +1,84 @@
+from django.db import migrations
+
+# SQLite only. The FTS5 index from 0010 read letters_loveletter by its implicit rowid, which VACUUM or a table rebuild
+# may renumber. The index now keeps its own copy of the text plus the letter UUID; its rows are keyed by
+# letters_loveletter_fts_ids, an INTEGER PRIMARY KEY (never renumbered) per letter, so triggers find a letter's row
+# through an index instead of scanning the FTS table. The SQL is frozen here like in 0010.
+COLUMNS = "beloved_name, beloved_nickname, sender_name, message"
+NEW_VALUES = "new.beloved_name, new.beloved_nickname, new.sender_name, new.message"
+OLD_ROW = "(SELECT id FROM letters_loveletter_fts_ids WHERE letter_id = old.id)"
+
+OLD_BACKWARD = [
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_ai",
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_ad",
+    "DROP TRIGGER IF EXISTS letters_loveletter_fts_au",
+    "DROP TABLE IF EXISTS letters_loveletter_fts",
+]
+FORWARD = [
+    *OLD_BACKWARD,
+    "DROP TABLE IF EXISTS letters_loveletter_fts_ids",
+    "CREATE TABLE letters_loveletter_fts_ids (id INTEGER PRIMARY KEY, letter_id char(32) NOT NULL UNIQUE)",
+    f"CREATE VIRTUAL TABLE letters_loveletter_fts USING fts5(letter_id UNINDEXED, {COLUMNS}, "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER letters_loveletter_fts_ai AFTER INSERT ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts_ids(letter_id) VALUES (new.id);
+        INSERT INTO letters_loveletter_fts(rowid, letter_id, {COLUMNS})
+        VALUES ((SELECT id FROM letters_loveletter_fts_ids WHERE letter_id = new.id), new.id, {NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER letters_loveletter_fts_ad AFTER DELETE ON letters_loveletter BEGIN
+        DELETE FROM letters_loveletter_fts WHERE rowid = {OLD_ROW};
+        DELETE FROM letters_loveletter_fts_ids WHERE letter_id = old.id;
+    END""",
+    f"""CREATE TRIGGER letters_loveletter_fts_au AFTER UPDATE OF {COLUMNS} ON letters_loveletter
+    WHEN old.beloved_name IS NOT new.beloved_name OR old.beloved_nickname IS NOT new.beloved_nickname
+        OR old.sender_name IS NOT new.sender_name OR old.message IS NOT new.message
+    BEGIN
+        DELETE FROM letters_loveletter_fts WHERE rowid = {OLD_ROW};
+        INSERT INTO letters_loveletter_fts(rowid, letter_id, {COLUMNS})
+        VALUES ({OLD_ROW}, new.id, {NEW_VALUES});
+    END""",
+    "INSERT INTO letters_loveletter_fts_ids(letter_id) SELECT id FROM letters_loveletter",
+    f"INSERT INTO letters_loveletter_fts(rowid, letter_id, {COLUMNS}) "
+    f"SELECT i.id, l.id, l.beloved_name, l.beloved_nickname, l.sender_name, l.message "
+    "FROM letters_loveletter l JOIN letters_loveletter_fts_ids i ON i.letter_id = l.id",
+]
+BACKWARD = [
+    *OLD_BACKWARD,
+    "DROP TABLE IF EXISTS letters_loveletter_fts_ids",
+    f"CREATE VIRTUAL TABLE letters_loveletter_fts USING fts5({COLUMNS}, "
+    "content='letters_loveletter', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER letters_loveletter_fts_ai AFTER INSERT ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(rowid, {COLUMNS}) VALUES (new.rowid, {NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER letters_loveletter_fts_ad AFTER DELETE ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(letters_loveletter_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.rowid, old.beloved_name, old.beloved_nickname, old.sender_name, old.message);
+    END""",
+    f"""CREATE TRIGGER letters_loveletter_fts_au AFTER UPDATE ON letters_loveletter BEGIN
+        INSERT INTO letters_loveletter_fts(letters_loveletter_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.rowid, old.beloved_name, old.beloved_nickname, old.sender_name, old.message);
+        INSERT INTO letters_loveletter_fts(rowid, {COLUMNS}) VALUES (new.rowid, {NEW_VALUES});
+    END""",
+    "INSERT INTO letters_loveletter_fts(letters_loveletter_fts) VALUES ('rebuild')",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('letters', '0016_dailysalesrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD), _run(BACKWARD)),
+    ]
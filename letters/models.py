@@ -1,8 +1,16 @@
+import json
 import uuid
+import zlib
+from datetime import timedelta
 from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from django_cleanup import cleanup
+
+from .storage import photo_storage
+from .utils import uuid7
 
 
 class LoveLetter(models.Model):
@@ -29,7 +37,8 @@ class LoveLetter(models.Model):
         ("unknown", "Outro"),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Time-ordered so inserts append to the primary key and foreign key indexes; older v4 ids stay valid.
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -50,16 +59,43 @@ class LoveLetter(models.Model):
     price = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal(settings.LOVE_LETTER_PRICE))
     is_paid = models.BooleanField(default=False)
     paid_at = models.DateTimeField(null=True, blank=True)
+    release_at = models.DateTimeField(null=True, blank=True)
+    release_processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["is_paid", "created_at"], name="letters_paid_created_idx"),
+            # Only letters still waiting for release are indexed, so the sweeper reads a small range.
+            models.Index(
+                fields=["release_at"],
+                condition=models.Q(release_at__isnull=False, release_processed_at__isnull=True),
+                name="letters_release_due_idx",
+            ),
+        ]
+
+    def is_released(self) -> bool:
+        return self.release_at is None or self.release_at <= timezone.now()
 
     def __str__(self) -> str:
         return f"Carta para {self.beloved_name} ({self.id})"
 
 
+@cleanup.ignore
+class PhotoBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} ({self.ref_count})"
+
+
+@cleanup.ignore
 class LovePhoto(models.Model):
     DISPLAY_MODE_CHOICES = [
         ("contain", "Ajustar"),
@@ -67,7 +103,9 @@ class LovePhoto(models.Model):
     ]
 
     letter = models.ForeignKey(LoveLetter, on_delete=models.CASCADE, related_name="photos")
-    image = models.ImageField(upload_to="letters/photos/")
+    # Shared with every other photo of the same blob; the file goes away only when the blob does.
+    image = models.ImageField(upload_to="letters/photos/", storage=photo_storage)
+    blob = models.ForeignKey(PhotoBlob, null=True, blank=True, on_delete=models.PROTECT, related_name="photos")
     display_mode = models.CharField(max_length=10, choices=DISPLAY_MODE_CHOICES, default="contain")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -75,6 +113,39 @@ class LovePhoto(models.Model):
         ordering = ["created_at"]
 
 
+class PhotoUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    letter = models.ForeignKey(LoveLetter, on_delete=models.CASCADE, related_name="pending_uploads")
+    filename = models.CharField(max_length=255)
+    length = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.length} bytes)"
+
+
+class LetterSnapshot(models.Model):
+    letter = models.OneToOneField(LoveLetter, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    version = models.PositiveSmallIntegerField(default=1)
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class LetterStats(models.Model):
+    letter = models.OneToOneField(LoveLetter, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    views = models.PositiveIntegerField(default=0)
+    opens = models.PositiveIntegerField(default=0)
+    first_opened_at = models.DateTimeField(null=True, blank=True)
+    last_opened_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class PaymentRecordQuerySet(models.QuerySet):
+    def hot(self):
+        # Bounding created_at lets Postgres prune the lookup to the recent monthly partitions.
+        return self.filter(created_at__gte=timezone.now() - timedelta(days=settings.PAYMENT_HOT_DAYS))
+
+
 class PaymentRecord(models.Model):
     METHOD_CHOICES = [
         ("pix", "PIX"),
@@ -96,3 +167,95 @@ class PaymentRecord(models.Model):
     raw_payload = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PaymentRecordQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["provider_payment_id"], name="letters_payment_provider_idx"),
+        ]
+
+
+class PaymentPayloadArchive(models.Model):
+    # Cold copy of PaymentRecord.raw_payload; no FK so it survives partition drops and draft purges.
+    payment_id = models.BigIntegerField(primary_key=True)
+    letter_id = models.UUIDField(db_index=True)
+    payment_created_at = models.DateTimeField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def compress(payload: dict) -> bytes:
+        return zlib.compress(json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8"), 9)
+
+    def load_payload(self) -> dict:
+        return json.loads(zlib.decompress(self.payload))
+
+    def __str__(self) -> str:
+        return f"Payload do pagamento {self.payment_id}"
+
+
+class DailySalesRollup(models.Model):
+    # One row per (day, payment method); letters created are not tied to a method and land on method "".
+    day = models.DateField()
+    method = models.CharField(max_length=20, blank=True)
+    letters_created = models.PositiveIntegerField(default=0)
+    letters_paid = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0"))
+    payments_started = models.PositiveIntegerField(default=0)
+    payments_paid = models.PositiveIntegerField(default=0)
+    payments_failed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day", "method"]
+        constraints = [models.UniqueConstraint(fields=["day", "method"], name="letters_rollup_day_method_uniq")]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.method or 'cartas'}"
+
+
+class OutboxEmail(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pendente"),
+        ("sent", "Enviado"),
+        ("failed", "Falhou"),
+    ]
+
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    alternatives = models.JSONField(default=list, blank=True)
+    attachments = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="letters_outbox_due_idx")]
+
+
+class RequestProfile(models.Model):
+    view_name = models.CharField(max_length=200, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    stats = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.view_name or self.path} ({self.duration_ms:.0f} ms)"
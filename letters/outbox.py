@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import base64
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    # Persists messages and returns immediately; delivery happens in send_outbox or the in-process sender.
+    def send_messages(self, email_messages) -> int:
+        rows = [_to_row(message) for message in email_messages if message.recipients()]
+        if not rows:
+            return 0
+        OutboxEmail.objects.bulk_create(rows)
+        transaction.on_commit(wake_sender)
+        return len(rows)
+
+
+def _to_row(message) -> OutboxEmail:
+    attachments = []
+    for attachment in message.attachments:
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        attachments.append([filename, base64.b64encode(content).decode("ascii"), mimetype])
+    return OutboxEmail(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        alternatives=[list(alternative) for alternative in getattr(message, "alternatives", [])],
+        attachments=attachments,
+    )
+
+
+def _to_message(row: OutboxEmail, connection) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+        cc=row.cc,
+        bcc=row.bcc,
+        reply_to=row.reply_to,
+        headers=row.headers,
+        connection=connection,
+    )
+    for content, mimetype in row.alternatives:
+        message.attach_alternative(content, mimetype)
+    for filename, content, mimetype in row.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600))
+
+
+def _claim_due(batch_size: int) -> list[OutboxEmail]:
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        # Lease the batch so a parallel sender skips it; a crash just lets it retry after the lease.
+        OutboxEmail.objects.filter(pk__in=[row.pk for row in rows]).update(next_attempt_at=now + timedelta(minutes=5))
+    return rows
+
+
+def deliver_due(batch_size: int = 50) -> tuple[int, int]:
+    rows = _claim_due(batch_size)
+    if not rows:
+        return 0, 0
+
+    sent = failed = 0
+    # One SMTP session for the whole batch instead of one per message.
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for row in rows:
+            _record_failure(row, exc)
+        return 0, len(rows)
+    try:
+        for row in rows:
+            try:
+                connection.send_messages([_to_message(row, connection)])
+            except Exception as exc:
+                _record_failure(row, exc)
+                failed += 1
+                continue
+            row.status = "sent"
+            row.attempts += 1
+            row.sent_at = timezone.now()
+            row.last_error = ""
+            row.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(row: OutboxEmail, exc: Exception) -> None:
+    row.attempts += 1
+    row.last_error = repr(exc)
+    if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        row.status = "failed"
+        logger.error("Email %s descartado apos %s tentativas: %s", row.pk, row.attempts, row.last_error)
+    else:
+        row.next_attempt_at = timezone.now() + _retry_delay(row.attempts)
+    row.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+
+
+def drain(batch_size: int = 50) -> tuple[int, int]:
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = deliver_due(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if sent + failed < batch_size:
+            return total_sent, total_failed
+
+
+class _Sender(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(name="outbox-sender", daemon=True)
+        self.wakeup = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            self.wakeup.wait(settings.OUTBOX_POLL_SECONDS)
+            self.wakeup.clear()
+            try:
+                drain()
+            except Exception:
+                logger.exception("Falha ao enviar emails do outbox")
+            finally:
+                close_old_connections()
+
+
+_sender: _Sender | None = None
+_sender_lock = threading.Lock()
+
+
+def wake_sender() -> None:
+    global _sender
+    if not settings.OUTBOX_INPROCESS_SENDER:
+        return
+    with _sender_lock:
+        if _sender is None or not _sender.is_alive():
+            _sender = _Sender()
+            _sender.start()
+    _sender.wakeup.set()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+PAYMENT_TABLE = "letters_paymentrecord"
+DEFAULT_PARTITION = f"{PAYMENT_TABLE}_default"
+PAYMENT_COLUMNS = "id, letter_id, method, provider_payment_id, amount, status, raw_payload, created_at, updated_at"
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PAYMENT_TABLE}_p{month:%Y%m}"
+
+
+def _bounds(month: date) -> tuple[str, str]:
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+def create_partition_sql(month: date) -> str:
+    lower, upper = _bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PAYMENT_TABLE} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s)",
+        [PAYMENT_TABLE],
+    )
+    return cursor.fetchone()[0]
+
+
+def _default_months(cursor) -> list[date]:
+    # Months that landed in the DEFAULT partition because their own partition did not exist yet.
+    cursor.execute(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION} ORDER BY 1"
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _create_partition(cursor, month: date) -> None:
+    lower, upper = _bounds(month)
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)", [lower, upper])
+    if not cursor.fetchone()[0]:
+        cursor.execute(create_partition_sql(month))
+        return
+    # PostgreSQL refuses a new partition whose range already has rows in DEFAULT. Detach DEFAULT, create the
+    # month, move its rows over and re-attach; the ACCESS EXCLUSIVE lock makes concurrent inserts wait meanwhile.
+    cursor.execute(f"ALTER TABLE {PAYMENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(create_partition_sql(month))
+    cursor.execute(
+        f"INSERT INTO {PAYMENT_TABLE} ({PAYMENT_COLUMNS}) SELECT {PAYMENT_COLUMNS} FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= %s AND created_at < %s",
+        [lower, upper],
+    )
+    cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s", [lower, upper])
+    cursor.execute(f"ALTER TABLE {PAYMENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+
+def ensure_payment_partitions(months_ahead: int, *, connection=default_connection) -> list[str]:
+    """Creates missing monthly partitions up to months_ahead, draining DEFAULT into them; returns the new ones."""
+    if connection.vendor != "postgresql":
+        return []
+    created = []
+    current = month_start(timezone.now())
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        months = sorted({*_default_months(cursor), *(add_months(current, offset) for offset in range(months_ahead + 1))})
+        for month in months:
+            cursor.execute("SELECT to_regclass(%s)", [partition_name(month)])
+            if cursor.fetchone()[0] is None:
+                _create_partition(cursor, month)
+                created.append(partition_name(month))
+    return created
@@ -5,18 +5,9 @@ from dataclasses import dataclass
 from django.conf import settings
 from django.urls import reverse
 
+from . import providers
 from .models import LoveLetter
 
-try:
-    import mercadopago
-except Exception:  # pragma: no cover
-    mercadopago = None
-
-try:
-    import stripe
-except Exception:  # pragma: no cover
-    stripe = None
-
 
 @dataclass
 class PaymentLaunchResult:
@@ -26,7 +17,8 @@ class PaymentLaunchResult:
 
 
 def create_mercado_pago_checkout(request, letter: LoveLetter) -> PaymentLaunchResult:
-    if not settings.MERCADO_PAGO_ACCESS_TOKEN or mercadopago is None:
+    mercadopago = providers.mercadopago() if settings.MERCADO_PAGO_ACCESS_TOKEN else None
+    if mercadopago is None:
         return PaymentLaunchResult(
             checkout_url=reverse("letters:simulate_payment", kwargs={"letter_id": str(letter.id), "method": "mercado_pago"}),
             external_id=f"sim-mp-{letter.id}",
@@ -53,7 +45,8 @@ def create_mercado_pago_checkout(request, letter: LoveLetter) -> PaymentLaunchRe
 
 
 def create_stripe_checkout(request, letter: LoveLetter) -> PaymentLaunchResult:
-    if not settings.STRIPE_SECRET_KEY or stripe is None:
+    stripe = providers.stripe() if settings.STRIPE_SECRET_KEY else None
+    if stripe is None:
         return PaymentLaunchResult(
             checkout_url=reverse("letters:simulate_payment", kwargs={"letter_id": str(letter.id), "method": "stripe"}),
             external_id=f"sim-st-{letter.id}",
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+from .models import RequestProfile
+
+TOKEN_SALT = "letters.profiling"
+TOKEN_HEADER = "HTTP_X_PROFILE_TOKEN"
+TOKEN_PARAM = "_profile"
+
+# cProfile cannot run two profilers at once; concurrent triggers are served unprofiled.
+profiler_lock = threading.Lock()
+
+
+def sign_profiling_token(user) -> str:
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def profiling_user(token: str):
+    try:
+        user_pk = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=user_pk, is_active=True, is_staff=True).first()
+
+
+def new_profiler() -> cProfile.Profile:
+    return cProfile.Profile()
+
+
+def save_profile(profiler: cProfile.Profile, *, request, response, duration_ms: float, user) -> RequestProfile:
+    profiler.create_stats()
+    match = getattr(request, "resolver_match", None)
+    record = RequestProfile.objects.create(
+        view_name=match.view_name if match else "",
+        method=request.method,
+        path=request.get_full_path()[:500],
+        status=response.status_code,
+        duration_ms=duration_ms,
+        user=user,
+        # Same format as pstats.Stats.dump_stats, so the download opens in snakeviz or pstats.
+        stats=marshal.dumps(profiler.stats),
+    )
+    stale = RequestProfile.objects.order_by("-created_at").values_list("pk", flat=True)[settings.PROFILING_MAX_RECORDS :]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    return record
+
+
+def profile_summary(record: RequestProfile, limit: int = 40) -> str:
+    output = io.StringIO()
+    stats = pstats.Stats(_StatsSource(record.stats), stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+class _StatsSource:
+    # pstats.Stats accepts any object exposing create_stats()/stats, like a finished Profile.
+    def __init__(self, raw: bytes) -> None:
+        self.stats = marshal.loads(bytes(raw))
+
+    def create_stats(self) -> None:
+        pass
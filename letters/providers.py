@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from types import ModuleType
+
+
+@lru_cache(maxsize=None)
+def _load(module_name: str) -> ModuleType | None:
+    # Heavy SDKs are imported on first use so boot, migrate and other commands skip them.
+    try:
+        return importlib.import_module(module_name)
+    except Exception:  # pragma: no cover
+        return None
+
+
+def stripe() -> ModuleType | None:
+    return _load("stripe")
+
+
+def mercadopago() -> ModuleType | None:
+    return _load("mercadopago")
+
+
+def qrcode() -> ModuleType | None:
+    return _load("qrcode")
+
+
+def pil_image() -> ModuleType | None:
+    return _load("PIL.Image")
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import traceback
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+from django.db import connections
+
+# Maximum queries per URL name, counted across every database alias (session and auth included).
+QUERY_BUDGETS: dict[str, int] = {
+    "letters:home": 2,
+    "letters:health": 0,
+    "letters:db_pool_health": 3,
+    "letters:history": 6,
+    "letters:bulk_import": 2,
+    "letters:export_data": 12,
+    "letters:profile": 2,
+    "letters:edit_letter": 4,
+    "letters:create_step": 5,
+    "letters:preview": 5,
+    "letters:payment": 4,
+    "letters:public_letter": 2,
+    "letters:unlock_letter": 2,
+    "letters:letter_qr": 2,  # replica read plus the primary re-read for a letter changed in the last few seconds
+}
+
+_PROJECT_ROOT = str(Path(settings.BASE_DIR))
+_TRANSACTION_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    stack: list[str]
+
+
+@dataclass
+class QueryCapture:
+    queries: list[CapturedQuery] = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(_TRANSACTION_PREFIXES):
+            return execute(sql, params, many, context)
+        # Keep only our own frames: that is where an N+1 is introduced and fixed.
+        frames = [
+            f"{frame.filename}:{frame.lineno} in {frame.name}"
+            for frame in traceback.extract_stack()[:-1]
+            if frame.filename.startswith(_PROJECT_ROOT) and "site-packages" not in frame.filename
+        ]
+        self.queries.append(CapturedQuery(sql=sql, stack=frames[-6:]))
+        return execute(sql, params, many, context)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryCapture]:
+    capture = QueryCapture()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(capture))
+        yield capture
+
+
+def budget_for(view_name: str | None) -> int | None:
+    return QUERY_BUDGETS.get(view_name) if view_name else None
+
+
+def describe_overrun(view_name: str, budget: int, capture: QueryCapture) -> str:
+    lines = [f"{view_name}: {len(capture)} queries (orcamento {budget})"]
+    for number, query in enumerate(capture.queries, start=1):
+        lines.append(f"  {number}. {query.sql}")
+        lines.extend(f"       {frame}" for frame in query.stack)
+    return "\n".join(lines)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from .models import LetterSnapshot, LoveLetter
+from .routers import primary_reads, reading_from_replica, settled_on_replica
+from .storage import photo_storage
+from .utils import music_embed_url, spotify_deep_link
+
+SNAPSHOT_VERSION = 2
+
+
+def build_letter_snapshot(letter: LoveLetter) -> dict:
+    photos = [(photo.image.name, photo.display_mode) for photo in letter.photos.all()]
+    return {
+        "id": str(letter.id),
+        "user_id": letter.user_id,
+        "beloved_name": letter.beloved_name,
+        "beloved_nickname": letter.beloved_nickname,
+        "sender_name": letter.sender_name,
+        "message": letter.message,
+        "tone": letter.tone,
+        "music_url": letter.music_url,
+        "music_provider": letter.music_provider,
+        "music_embed": music_embed_url(letter.music_url, letter.music_provider),
+        "spotify_deep_link": spotify_deep_link(letter.music_url) if letter.music_provider == "spotify" else "",
+        "is_paid": letter.is_paid,
+        "is_protected": bool(letter.password_hash),
+        "release_at": letter.release_at.isoformat() if letter.release_at else None,
+        "updated_at": letter.updated_at.isoformat() if letter.updated_at else None,
+        # File names rather than URLs: presigned photo URLs expire, so they are resolved at render time.
+        "photos": [{"name": name, "display_mode": display_mode} for name, display_mode in photos if name],
+    }
+
+
+def refresh_letter_snapshot(letter: LoveLetter) -> LetterSnapshot:
+    snapshot, _ = LetterSnapshot.objects.update_or_create(
+        letter=letter,
+        defaults={"version": SNAPSHOT_VERSION, "data": build_letter_snapshot(letter)},
+    )
+    return snapshot
+
+
+def get_letter_snapshot(letter_id, user=None) -> LetterSnapshot | None:
+    snapshots = LetterSnapshot.objects.filter(letter_id=letter_id)
+    if user is not None:
+        snapshots = snapshots.filter(letter__user=user)
+    snapshot = snapshots.first()
+    if snapshot is not None and snapshot.version == SNAPSHOT_VERSION:
+        return snapshot
+
+    # Missing or outdated snapshot: rebuild it from the normalized tables once.
+    letters = LoveLetter.objects.filter(id=letter_id)
+    if user is not None:
+        letters = letters.filter(user=user)
+    letter = letters.first()
+    if letter is None:
+        return None
+    return refresh_letter_snapshot(letter)
+
+
+def get_public_snapshot(letter_id) -> LetterSnapshot | None:
+    if reading_from_replica():
+        snapshot = LetterSnapshot.objects.filter(letter_id=letter_id, version=SNAPSHOT_VERSION).first()
+        if snapshot is not None and snapshot.data["is_paid"] and settled_on_replica(snapshot.updated_at):
+            return snapshot
+    # Missing, unpaid or just-changed snapshots may be stale on the replica: decide on the primary instead.
+    with primary_reads():
+        return get_letter_snapshot(letter_id)
+
+
+def snapshot_context(data: dict) -> dict:
+    storage = photo_storage()
+    letter = {**data, "photos": [{**photo, "url": storage.url(photo["name"])} for photo in data["photos"]]}
+    return {"letter": letter, "music_embed": data["music_embed"], "spotify_deep_link": data["spotify_deep_link"]}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import LetterSnapshot, LoveLetter
+from .read_models import refresh_letter_snapshot
+
+
+def pending_releases():
+    # Matches the partial index letters_release_due_idx.
+    return LoveLetter.objects.filter(release_at__isnull=False, release_processed_at__isnull=True)
+
+
+def due_releases():
+    # Unpaid letters stay pending: once paid, the next sweep releases them and sends the email.
+    return pending_releases().filter(is_paid=True)
+
+
+def next_release_at() -> datetime | None:
+    return due_releases().aggregate(next_at=Min("release_at"))["next_at"]
+
+
+def _release_email(letter: LoveLetter) -> EmailMessage:
+    link = settings.SITE_URL.rstrip("/") + reverse("letters:public_letter", kwargs={"letter_id": str(letter.id)})
+    return EmailMessage(
+        subject=f"Sua carta para {letter.beloved_name} foi liberada",
+        body=(
+            f"A carta para {letter.beloved_name} acabou de ser liberada e ja pode ser aberta.\n\n"
+            f"Link da carta: {link}\n"
+        ),
+        to=[letter.user.email],
+    )
+
+
+def release_due_letters(*, now: datetime | None = None, batch_size: int = 1000) -> int:
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Claim the batch: a concurrent sweeper skips these rows instead of releasing (and emailing) them again, and
+        # release_processed_at commits together with the emails queued below.
+        letters = list(
+            due_releases()
+            .filter(release_at__lte=now)
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("user")
+            .order_by("release_at")[:batch_size]
+        )
+        if not letters:
+            return 0
+        LoveLetter.objects.filter(pk__in=[letter.pk for letter in letters]).update(release_processed_at=now)
+
+        # Pre-warm the read model so the first recipient hit after release is a single-row lookup.
+        warmed = set(LetterSnapshot.objects.filter(letter__in=letters).values_list("letter_id", flat=True))
+        for letter in letters:
+            if letter.pk not in warmed:
+                refresh_letter_snapshot(letter)
+
+        notifications = [_release_email(letter) for letter in letters if letter.user and letter.user.email]
+        if notifications:
+            transaction.on_commit(lambda: get_connection().send_messages(notifications))
+    return len(letters)
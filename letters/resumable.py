@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import fcntl
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import IO
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from . import providers
+from .blobs import attach_photo
+from .models import LoveLetter, LovePhoto, PhotoUpload
+
+TUS_VERSION = "1.0.0"
+# Same limits as PhotoUploadForm: 6 photos per batch, 5 MB each.
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+MAX_PENDING_UPLOADS = 6
+APPEND_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def parse_metadata(header: str) -> dict[str, str]:
+    metadata = {}
+    for pair in header.split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value).decode("utf-8") if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError("Upload-Metadata invalido.")
+    return metadata
+
+
+def upload_path(upload: PhotoUpload) -> Path:
+    return Path(settings.RESUMABLE_UPLOAD_DIR) / f"{upload.pk}.part"
+
+
+def current_offset(upload: PhotoUpload) -> int:
+    try:
+        return upload_path(upload).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def expire_stale_uploads() -> None:
+    hours = settings.RESUMABLE_UPLOAD_EXPIRE_HOURS
+    PhotoUpload.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours)).delete()
+    # Also catches temp files left behind when their letter (and session row) was deleted.
+    cutoff = time.time() - hours * 3600
+    try:
+        with os.scandir(settings.RESUMABLE_UPLOAD_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except OSError:
+        return
+
+
+def create_upload(letter: LoveLetter, *, length: int, filename: str) -> PhotoUpload:
+    if length <= 0:
+        raise UploadError("Upload-Length invalido.")
+    if length > MAX_UPLOAD_BYTES:
+        raise UploadError(f"Cada foto deve ter ate {MAX_UPLOAD_BYTES // (1024 * 1024)}MB.", status=413)
+    expire_stale_uploads()
+    if letter.pending_uploads.count() >= MAX_PENDING_UPLOADS:
+        raise UploadError(f"Envie no maximo {MAX_PENDING_UPLOADS} fotos por vez.", status=429)
+    upload = PhotoUpload.objects.create(letter=letter, length=length, filename=os.path.basename(filename) or "foto")
+    path = upload_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def append_chunk(upload: PhotoUpload, stream: IO[bytes], *, offset: int, content_length: int) -> int:
+    path = upload_path(upload)
+    if not path.exists():
+        raise UploadError("Envio expirado.", status=410)
+    with open(path, "ab") as handle:
+        # One writer per upload; a duplicate PATCH from a retrying client must not interleave bytes.
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError("Envio em andamento.", status=423)
+        current = handle.seek(0, os.SEEK_END)
+        if offset != current:
+            raise UploadError("Upload-Offset nao confere.", status=409)
+        if current + content_length > upload.length:
+            raise UploadError("Bloco ultrapassa o tamanho declarado.", status=413)
+        remaining = content_length
+        while remaining > 0:
+            chunk = stream.read(min(APPEND_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            handle.write(chunk)
+            remaining -= len(chunk)
+        return current + content_length - remaining
+
+
+def finish_upload(upload: PhotoUpload) -> LovePhoto:
+    path = upload_path(upload)
+    try:
+        with open(path, "rb") as handle:
+            providers.pil_image().open(handle).verify()
+    except Exception:
+        discard_upload(upload)
+        raise UploadError("Envie apenas arquivos de imagem validos.", status=422)
+    with open(path, "rb") as handle:
+        photo = attach_photo(upload.letter, File(handle, name=upload.filename))
+    discard_upload(upload)
+    return photo
+
+
+def discard_upload(upload: PhotoUpload) -> None:
+    upload_path(upload).unlink(missing_ok=True)
+    upload.delete()
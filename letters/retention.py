@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .blobs import PHOTO_RELEASE_DISPATCH_UID, release_photo_files
+from .models import LoveLetter, LovePhoto, PaymentPayloadArchive, PaymentRecord, PhotoBlob
+
+
+@dataclass
+class PurgeResult:
+    letters: int = 0
+    photos: int = 0
+    payments: int = 0
+    files: int = 0
+    bytes_reclaimed: int = 0
+    dry_run: bool = False
+
+
+@dataclass
+class MediaGCResult:
+    scanned: int = 0
+    referenced: int = 0
+    protected: int = 0
+    orphans: int = 0
+    bytes_reclaimed: int = 0
+    dry_run: bool = False
+
+
+@dataclass
+class PayloadArchiveResult:
+    payments: int = 0
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+    dry_run: bool = False
+
+
+def draft_cutoff(days: int) -> datetime:
+    return timezone.now() - timedelta(days=days)
+
+
+def iter_abandoned_draft_chunks(cutoff: datetime, chunk_size: int) -> Iterator[list]:
+    # Keyset pagination on (created_at, id) so each chunk is an index range scan, not an OFFSET.
+    last_key = None
+    while True:
+        queryset = LoveLetter.objects.filter(is_paid=False, created_at__lt=cutoff)
+        if last_key is not None:
+            last_created_at, last_id = last_key
+            queryset = queryset.filter(Q(created_at__gt=last_created_at) | Q(created_at=last_created_at, id__gt=last_id))
+        rows = list(queryset.order_by("created_at", "id").values_list("created_at", "id")[:chunk_size])
+        if not rows:
+            return
+        yield [letter_id for _, letter_id in rows]
+        last_key = rows[-1]
+
+
+@contextmanager
+def _photo_release_paused():
+    # The signal releases blobs one post_delete at a time; we release a whole chunk at once instead.
+    disconnected = post_delete.disconnect(sender=LovePhoto, dispatch_uid=PHOTO_RELEASE_DISPATCH_UID)
+    try:
+        yield
+    finally:
+        if disconnected:
+            from .signals import release_photo_file
+
+            post_delete.connect(release_photo_file, sender=LovePhoto, dispatch_uid=PHOTO_RELEASE_DISPATCH_UID)
+
+
+def _file_size(storage, name: str) -> int:
+    try:
+        return storage.size(name)
+    except (OSError, NotImplementedError):
+        return 0
+
+
+def _delete_file(storage, name: str) -> int:
+    size = _file_size(storage, name)
+    try:
+        storage.delete(name)
+    except OSError:
+        return -1
+    return size
+
+
+def _photo_refs(letter_ids: list) -> list[tuple[int | None, str]]:
+    return list(LovePhoto.objects.filter(letter_id__in=letter_ids).values_list("blob_id", "image"))
+
+
+def _unshared_names(refs: list[tuple[int | None, str]]) -> list[str]:
+    # Dry-run estimate: a blob is freed when every remaining reference belongs to this chunk.
+    counts: dict[int, int] = {}
+    names = []
+    for blob_id, name in refs:
+        if blob_id is None:
+            names.append(name)
+        else:
+            counts[blob_id] = counts.get(blob_id, 0) + 1
+    for blob_id, name, ref_count in PhotoBlob.objects.filter(pk__in=counts).values_list("id", "name", "ref_count"):
+        if ref_count <= counts[blob_id]:
+            names.append(name)
+    return [name for name in names if name]
+
+
+def purge_abandoned_drafts(
+    *,
+    days: int,
+    chunk_size: int = 500,
+    workers: int = 4,
+    dry_run: bool = False,
+) -> PurgeResult:
+    result = PurgeResult(dry_run=dry_run)
+    storage = LovePhoto._meta.get_field("image").storage
+    cutoff = draft_cutoff(days)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, _photo_release_paused():
+        for letter_ids in iter_abandoned_draft_chunks(cutoff, chunk_size):
+            if dry_run:
+                refs = _photo_refs(letter_ids)
+                file_names = _unshared_names(refs)
+                result.letters += len(letter_ids)
+                result.photos += len(refs)
+                result.payments += PaymentRecord.objects.filter(letter_id__in=letter_ids).count()
+                result.files += len(file_names)
+                result.bytes_reclaimed += sum(executor.map(lambda name: _file_size(storage, name), file_names))
+                continue
+
+            with transaction.atomic():
+                # Re-check is_paid inside the transaction in case a webhook landed after the scan.
+                queryset = LoveLetter.objects.select_for_update().filter(id__in=letter_ids, is_paid=False)
+                letter_ids = list(queryset.values_list("id", flat=True))
+                refs = _photo_refs(letter_ids)
+                _, per_model = LoveLetter.objects.filter(id__in=letter_ids).delete()
+                # Photos shared with letters that survive keep their file; only unreferenced blobs are freed.
+                file_names = release_photo_files(refs)
+            result.letters += per_model.get(LoveLetter._meta.label, 0)
+            result.photos += per_model.get(LovePhoto._meta.label, 0)
+            result.payments += per_model.get(PaymentRecord._meta.label, 0)
+
+            for size in executor.map(lambda name: _delete_file(storage, name), file_names):
+                if size >= 0:
+                    result.files += 1
+                    result.bytes_reclaimed += size
+
+    return result
+
+
+def _name_key(name: str) -> int:
+    # 8-byte digests keep the referenced set compact; a collision only spares an orphan.
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def referenced_media_keys(chunk_size: int = 2000) -> set[int]:
+    names = LovePhoto.objects.exclude(image="").values_list("image", flat=True).iterator(chunk_size=chunk_size)
+    return {_name_key(name) for name in names}
+
+
+def iter_media_files(root: str, prefix: str) -> Iterator[tuple[str, os.DirEntry]]:
+    stack = [prefix.strip("/")]
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir)) as entries:
+                for entry in entries:
+                    relative_name = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(relative_name)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield relative_name, entry
+        except FileNotFoundError:
+            continue
+
+
+def collect_orphaned_media(
+    *,
+    root: str,
+    prefix: str = "letters/photos",
+    grace_hours: int = 24,
+    dry_run: bool = False,
+) -> MediaGCResult:
+    result = MediaGCResult(dry_run=dry_run)
+    # Read the grace cutoff before the DB snapshot so uploads committed after it are still protected.
+    cutoff = time.time() - grace_hours * 3600
+    referenced = referenced_media_keys()
+
+    for name, entry in iter_media_files(root, prefix):
+        result.scanned += 1
+        if _name_key(name) in referenced:
+            result.referenced += 1
+            continue
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            result.protected += 1
+            continue
+        if not dry_run:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+        result.orphans += 1
+        result.bytes_reclaimed += stat.st_size
+    return result
+
+
+def archive_payment_payloads(*, days: int, batch_size: int = 500, dry_run: bool = False) -> PayloadArchiveResult:
+    """Moves raw_payload of payments older than N days into the compressed cold table."""
+    result = PayloadArchiveResult(dry_run=dry_run)
+    cutoff = draft_cutoff(days)
+    last_id = 0
+    while True:
+        queryset = PaymentRecord.objects.filter(created_at__lt=cutoff, id__gt=last_id).exclude(raw_payload={})
+        rows = list(queryset.order_by("id").values_list("id", "letter_id", "created_at", "raw_payload")[:batch_size])
+        if not rows:
+            return result
+        last_id = rows[-1][0]
+
+        archives = []
+        for payment_id, letter_id, created_at, payload in rows:
+            compressed = PaymentPayloadArchive.compress(payload)
+            result.raw_bytes += len(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+            result.compressed_bytes += len(compressed)
+            archives.append(
+                PaymentPayloadArchive(
+                    payment_id=payment_id, letter_id=letter_id, payment_created_at=created_at, payload=compressed
+                )
+            )
+        result.payments += len(rows)
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            PaymentPayloadArchive.objects.bulk_create(
+                archives,
+                update_conflicts=True,
+                unique_fields=["payment_id"],
+                update_fields=["payload", "archived_at"],
+            )
+            # created_at in the filter keeps the update on the cold partitions; update() leaves updated_at alone.
+            PaymentRecord.objects.filter(id__in=[row[0] for row in rows], created_at__lt=cutoff).update(raw_payload={})
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailySalesRollup, LoveLetter, PaymentRecord
+
+COUNTERS = ("letters_created", "letters_paid", "revenue", "payments_started", "payments_paid", "payments_failed")
+STATUS_COUNTERS = {"paid": "payments_paid", "failed": "payments_failed"}
+DASHBOARD_MAX_DAYS = 366
+
+
+def _bump(day: date, method: str, **deltas) -> None:
+    ops = connection.ops
+    table = ops.quote_name(DailySalesRollup._meta.db_table)
+    values = [DailySalesRollup._meta.get_field("day").get_db_prep_value(day, connection), method]
+    for name in COUNTERS:
+        values.append(DailySalesRollup._meta.get_field(name).get_db_prep_value(deltas.get(name, 0), connection))
+    values.append(timezone.now())
+    columns = ", ".join(COUNTERS)
+    updates = ", ".join(f"{name} = {table}.{name} + excluded.{name}" for name in COUNTERS)
+    # Same additive upsert as the view counters: concurrent bumps for one day never lose an increment.
+    sql = f"""
+        INSERT INTO {table} (day, method, {columns}, updated_at)
+        VALUES ({", ".join(["%s"] * len(values))})
+        ON CONFLICT (day, method) DO UPDATE SET {updates}, updated_at = excluded.updated_at
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+
+
+def record_letters_created(count: int = 1, when: datetime | None = None) -> None:
+    if count:
+        _bump(timezone.localdate(when), "", letters_created=count)
+
+
+def record_payment_started(method: str, when: datetime | None = None) -> None:
+    _bump(timezone.localdate(when), method, payments_started=1)
+
+
+def record_payment_status(method: str, status: str, count: int = 1) -> None:
+    counter = STATUS_COUNTERS.get(status)
+    if counter and count:
+        _bump(timezone.localdate(), method, **{counter: count})
+
+
+def record_letter_paid(letter: LoveLetter, method: str) -> None:
+    _bump(timezone.localdate(letter.paid_at), method, letters_paid=1, revenue=Decimal(letter.price))
+
+
+def rebuild_rollups(since: date | None = None) -> int:
+    """Recomputes the rollups from the raw tables, from `since` onwards (or entirely). Returns rows written."""
+    tz = timezone.get_current_timezone()
+    start = datetime.combine(since, time.min, tzinfo=tz) if since else None
+    buckets: dict[tuple[date, str], dict] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    letters = LoveLetter.objects.all()
+    if start:
+        letters = letters.filter(created_at__gte=start)
+    created = letters.annotate(day=TruncDate("created_at", tzinfo=tz)).values("day").annotate(total=Count("id"))
+    for row in created.order_by():
+        buckets[(row["day"], "")]["letters_created"] = row["total"]
+
+    # A sale is credited to the method of its first confirmed payment, as _mark_letter_paid does.
+    paid_method = PaymentRecord.objects.filter(letter=OuterRef("pk"), status="paid").order_by("updated_at", "id")
+    paid = LoveLetter.objects.filter(is_paid=True, paid_at__isnull=False)
+    if start:
+        paid = paid.filter(paid_at__gte=start)
+    paid = (
+        paid.annotate(day=TruncDate("paid_at", tzinfo=tz), paid_method=Coalesce(Subquery(paid_method.values("method")[:1]), Value("")))
+        .values("day", "paid_method")
+        .annotate(total=Count("id"), revenue=Sum("price"))
+    )
+    for row in paid.order_by():
+        bucket = buckets[(row["day"], row["paid_method"])]
+        bucket["letters_paid"] = row["total"]
+        bucket["revenue"] = row["revenue"] or Decimal("0")
+
+    payments = PaymentRecord.objects.all()
+    started = payments.filter(created_at__gte=start) if start else payments
+    started = started.annotate(day=TruncDate("created_at", tzinfo=tz)).values("day", "method").annotate(total=Count("id"))
+    for row in started.order_by():
+        buckets[(row["day"], row["method"])]["payments_started"] = row["total"]
+
+    # Status changes are dated by updated_at, the closest the raw rows get to the moment of the change.
+    settled = payments.filter(status__in=STATUS_COUNTERS)
+    if start:
+        settled = settled.filter(updated_at__gte=start)
+    settled = settled.annotate(day=TruncDate("updated_at", tzinfo=tz)).values("day", "method", "status").annotate(total=Count("id"))
+    for row in settled.order_by():
+        buckets[(row["day"], row["method"])][STATUS_COUNTERS[row["status"]]] = row["total"]
+
+    rollups = [DailySalesRollup(day=day, method=method, **counters) for (day, method), counters in sorted(buckets.items())]
+    with transaction.atomic():
+        existing = DailySalesRollup.objects.all()
+        if since:
+            existing = existing.filter(day__gte=since)
+        existing.delete()
+        DailySalesRollup.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def sales_dashboard(days: int) -> dict:
+    """Reads only the rollup rows of the last N days, so the cost does not grow with the history."""
+    days = max(1, min(days, DASHBOARD_MAX_DAYS))
+    start = timezone.localdate() - timedelta(days=days - 1)
+    per_day: dict[date, dict] = {}
+    per_method: dict[str, dict] = {}
+    totals = dict.fromkeys(COUNTERS, 0)
+    for rollup in DailySalesRollup.objects.filter(day__gte=start).order_by("-day", "method"):
+        day = per_day.setdefault(rollup.day, {"day": rollup.day, **dict.fromkeys(COUNTERS, 0)})
+        method = per_method.setdefault(rollup.method, {"method": rollup.method, **dict.fromkeys(COUNTERS, 0)})
+        for name in COUNTERS:
+            value = getattr(rollup, name)
+            day[name] += value
+            method[name] += value
+            totals[name] += value
+    for row in [*per_day.values(), totals]:
+        row["conversion"] = round(100 * row["letters_paid"] / row["letters_created"], 1) if row["letters_created"] else None
+    return {
+        "days": days,
+        "start": start,
+        "per_day": list(per_day.values()),
+        "per_method": [per_method[key] for key in sorted(per_method) if key],
+        "totals": totals,
+    }
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+
+REPLICA_ALIAS = "replica"
+_use_replica: ContextVar[bool] = ContextVar("letters_use_replica", default=False)
+
+
+def replica_enabled() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def reading_from_replica() -> bool:
+    return _use_replica.get()
+
+
+@contextmanager
+def primary_reads():
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def settled_on_replica(updated_at) -> bool:
+    # A row changed within REPLICA_PIN_SECONDS may not have replicated yet, so the replica's copy can be stale
+    # (a letter paid a second ago would still look unpaid). Older rows are safe to serve from the replica.
+    return updated_at is not None and updated_at <= timezone.now() - timedelta(seconds=settings.REPLICA_PIN_SECONDS)
+
+
+def read_from_replica(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_enabled():
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    # Only letters models are routed; sessions and auth always stay on the primary.
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label == "letters":
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import LoveLetter
+
+FTS_TABLE = "letters_loveletter_fts"
+SEARCH_FIELDS = ("beloved_name", "beloved_nickname", "sender_name", "message")
+
+POSTGRES_INDEX = "letters_loveletter_search_idx"
+
+FTS_IDS_TABLE = f"{FTS_TABLE}_ids"
+
+_columns = ", ".join(SEARCH_FIELDS)
+_new_values = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+_changed = " OR ".join(f"old.{field} IS NOT new.{field}" for field in SEARCH_FIELDS)
+_old_row = f"(SELECT id FROM {FTS_IDS_TABLE} WHERE letter_id = old.id)"
+# Current definitions, used to repair the index; migration 0017 keeps its own frozen copy. The FTS table holds its
+# own copy of the text and the letter UUID, so it never depends on letters_loveletter's rowid; FTS_IDS_TABLE gives
+# each letter a stable INTEGER PRIMARY KEY so the triggers reach its FTS row through an index.
+SQLITE_TABLES = {
+    FTS_IDS_TABLE: f"CREATE TABLE {FTS_IDS_TABLE} (id INTEGER PRIMARY KEY, letter_id char(32) NOT NULL UNIQUE)",
+    FTS_TABLE: (
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(letter_id UNINDEXED, {_columns}, "
+        "tokenize='unicode61 remove_diacritics 2')"
+    ),
+}
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON letters_loveletter BEGIN
+        INSERT INTO {FTS_IDS_TABLE}(letter_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, letter_id, {_columns})
+        VALUES ((SELECT id FROM {FTS_IDS_TABLE} WHERE letter_id = new.id), new.id, {_new_values});
+    END""",
+    f"{FTS_TABLE}_ad": f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON letters_loveletter BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_old_row};
+        DELETE FROM {FTS_IDS_TABLE} WHERE letter_id = old.id;
+    END""",
+    f"{FTS_TABLE}_au": f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON letters_loveletter
+    WHEN {_changed}
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_old_row};
+        INSERT INTO {FTS_TABLE}(rowid, letter_id, {_columns}) VALUES ({_old_row}, new.id, {_new_values});
+    END""",
+}
+
+
+def _sqlite_objects(cursor, kind: str) -> set[str]:
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = %s", [kind])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def check_search_index() -> list[str]:
+    """Lists what is wrong with the full-text index; an empty list means searches can be trusted."""
+    problems = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT to_regclass(%s)", [POSTGRES_INDEX])
+            if cursor.fetchone()[0] is None:
+                problems.append(f"indice {POSTGRES_INDEX} ausente")
+            return problems
+        if connection.vendor != "sqlite":
+            return problems
+        missing = [name for name in SQLITE_TABLES if name not in _sqlite_objects(cursor, "table")]
+        if missing:
+            return [f"tabela {name} ausente" for name in missing]
+        # A table rebuild (AlterField) drops the triggers along with the old table, and later writes go unindexed.
+        problems.extend(f"trigger {name} ausente" for name in sorted(set(SQLITE_TRIGGERS) - _sqlite_objects(cursor, "trigger")))
+        stale = " OR ".join(f"f.{field} IS NOT l.{field}" for field in SEARCH_FIELDS)
+        cursor.execute(
+            f"SELECT (SELECT COUNT(*) FROM letters_loveletter l WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {FTS_IDS_TABLE} i WHERE i.letter_id = l.id)), "
+            f"(SELECT COUNT(*) FROM {FTS_IDS_TABLE} i WHERE NOT EXISTS "
+            "(SELECT 1 FROM letters_loveletter l WHERE l.id = i.letter_id)), "
+            f"(SELECT COUNT(*) FROM {FTS_IDS_TABLE} i JOIN letters_loveletter l ON l.id = i.letter_id "
+            f"LEFT JOIN {FTS_TABLE} f ON f.rowid = i.id WHERE f.rowid IS NULL OR f.letter_id IS NOT l.id OR {stale})"
+        )
+        unindexed, orphaned, stale_rows = cursor.fetchone()
+        if unindexed or orphaned or stale_rows:
+            problems.append(
+                f"{FTS_TABLE} fora de sincronia: {unindexed} carta(s) fora do indice, {orphaned} entrada(s) sem carta, "
+                f"{stale_rows} com texto desatualizado"
+            )
+    return problems
+
+
+def rebuild_search_index() -> None:
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"REINDEX INDEX {POSTGRES_INDEX}")
+            return
+        if connection.vendor != "sqlite":
+            return
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name in SQLITE_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        for sql in (*SQLITE_TABLES.values(), *SQLITE_TRIGGERS.values()):
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_IDS_TABLE}(letter_id) SELECT id FROM letters_loveletter")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, letter_id, {_columns}) "
+            f"SELECT i.id, l.id, {', '.join(f'l.{field}' for field in SEARCH_FIELDS)} "
+            f"FROM letters_loveletter l JOIN {FTS_IDS_TABLE} i ON i.letter_id = l.id"
+        )
+
+
+def _terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query)[:10]
+
+
+# Sliceable and countable so it can be handed straight to Django's Paginator.
+class RankedLetterSearch:
+    def __init__(self, user, query: str) -> None:
+        self.user = user
+        self.query = query
+        self.terms = _terms(query)
+
+    def count(self) -> int:
+        if not self.terms:
+            return 0
+        if connection.vendor in {"postgresql", "sqlite"}:
+            sql, params = self._ranked_sql(count=True)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchone()[0]
+        return self._fallback().count()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item: slice) -> list[LoveLetter]:
+        if not self.terms:
+            return []
+        offset = item.start or 0
+        limit = (item.stop or offset) - offset
+        if connection.vendor not in {"postgresql", "sqlite"}:
+            return list(self._fallback()[offset : offset + limit])
+        sql, params = self._ranked_sql(count=False)
+        with connection.cursor() as cursor:
+            cursor.execute(f"{sql} LIMIT %s OFFSET %s", [*params, limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        ids = [LoveLetter._meta.pk.to_python(pk) for pk in ids]
+        letters = LoveLetter.objects.select_related("stats").in_bulk(ids)
+        return [letters[pk] for pk in ids if pk in letters]
+
+    def _ranked_sql(self, *, count: bool) -> tuple[str, list]:
+        user_id = self.user.pk
+        if connection.vendor == "postgresql":
+            tsquery = " & ".join(f"{term}:*" for term in self.terms)
+            base = (
+                "FROM letters_loveletter l, to_tsquery('portuguese', %s) q "
+                "WHERE l.user_id = %s AND l.search_vector @@ q"
+            )
+            if count:
+                return f"SELECT COUNT(*) {base}", [tsquery, user_id]
+            return f"SELECT l.id {base} ORDER BY ts_rank(l.search_vector, q) DESC, l.created_at DESC", [tsquery, user_id]
+
+        match = " ".join(f'"{term}"*' for term in self.terms)
+        # CROSS JOIN pins the join order so SQLite drives from the FTS match instead of the user_id index. Going through
+        # FTS_IDS_TABLE's integer key to the letter UUID is about twice as fast as reading f.letter_id back out of
+        # the FTS content table, and neither depends on letters_loveletter's rowid.
+        base = (
+            f"FROM {FTS_TABLE} f CROSS JOIN {FTS_IDS_TABLE} i ON i.id = f.rowid "
+            f"CROSS JOIN letters_loveletter l ON l.id = i.letter_id "
+            f"WHERE {FTS_TABLE} MATCH %s AND l.user_id = %s"
+        )
+        if count:
+            return f"SELECT COUNT(*) {base}", [match, user_id]
+        # bm25 weights follow SEARCH_FIELDS: names count more than the message body.
+        order = f"ORDER BY bm25({FTS_TABLE}, 10.0, 10.0, 5.0, 1.0), l.created_at DESC"
+        return f"SELECT l.id {base} {order}", [match, user_id]
+
+    def _fallback(self):
+        condition = Q()
+        for term in self.terms:
+            condition &= Q(beloved_name__icontains=term) | Q(beloved_nickname__icontains=term) | Q(
+                sender_name__icontains=term
+            ) | Q(message__icontains=term)
+        return LoveLetter.objects.filter(condition, user=self.user)
+
+
+def search_letters(user, query: str) -> RankedLetterSearch:
+    return RankedLetterSearch(user, query)
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .blobs import PHOTO_RELEASE_DISPATCH_UID, delete_files, release_photo_files
+from .models import LoveLetter, LovePhoto, PaymentRecord
+from .read_models import refresh_letter_snapshot
+from .rollups import record_letters_created, record_payment_started
+
+
+@receiver(post_save, sender=LoveLetter)
+def refresh_saved_letter_snapshot(sender, instance: LoveLetter, **kwargs) -> None:
+    refresh_letter_snapshot(instance)
+
+
+@receiver(post_save, sender=LoveLetter)
+def count_created_letter(sender, instance: LoveLetter, created: bool, **kwargs) -> None:
+    if created:
+        record_letters_created(when=instance.created_at)
+
+
+@receiver(post_save, sender=PaymentRecord)
+def count_started_payment(sender, instance: PaymentRecord, created: bool, **kwargs) -> None:
+    if created:
+        record_payment_started(instance.method, when=instance.created_at)
+
+
+@receiver(post_save, sender=LovePhoto)
+@receiver(post_delete, sender=LovePhoto)
+def refresh_snapshot_for_photo(sender, instance: LovePhoto, **kwargs) -> None:
+    # Skip cascades from a letter delete: re-creating the snapshot there would resurrect a dangling row.
+    origin = kwargs.get("origin")
+    if origin is not None and not isinstance(origin, LovePhoto):
+        return
+    letter = LoveLetter.objects.filter(pk=instance.letter_id).first()
+    if letter is not None:
+        refresh_letter_snapshot(letter)
+
+
+@receiver(post_delete, sender=LovePhoto, dispatch_uid=PHOTO_RELEASE_DISPATCH_UID)
+def release_photo_file(sender, instance: LovePhoto, **kwargs) -> None:
+    # Runs for delete_photo and for every photo cascaded from a letter delete.
+    names = release_photo_files([(instance.blob_id, instance.image.name)])
+    if names:
+        transaction.on_commit(lambda: delete_files(names))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage, storages
+
+CHUNK_SIZE = 64 * 1024
+
+
+def photo_storage() -> Storage:
+    return storages["photos"]
+
+
+@dataclass
+class PhotoCopyResult:
+    copied: int = 0
+    skipped: int = 0
+    missing: list[str] = field(default_factory=list)
+    mismatched: list[str] = field(default_factory=list)
+    bytes_copied: int = 0
+
+
+def _checksum(storage: Storage, name: str) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with storage.open(name, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def find_local_source(name: str) -> FileSystemStorage | None:
+    for root in settings.MEDIA_FALLBACK_DIRS:
+        if (Path(root) / name).is_file():
+            return FileSystemStorage(location=root)
+    return None
+
+
+def copy_photo(name: str, target: Storage) -> tuple[str, int]:
+    source = find_local_source(name)
+    if source is None:
+        return "missing", 0
+    source_checksum, size = _checksum(source, name)
+    if target.exists(name) and _checksum(target, name)[0] == source_checksum:
+        return "skipped", 0
+    with source.open(name, "rb") as handle:
+        saved_name = target.save(name, handle)
+    if saved_name != name or _checksum(target, saved_name)[0] != source_checksum:
+        return "mismatched", 0
+    return "copied", size
+
+
+def copy_photos(names, target: Storage, workers: int = 8) -> PhotoCopyResult:
+    result = PhotoCopyResult()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name, (status, size) in zip(names, executor.map(lambda name: copy_photo(name, target), names)):
+            if status == "copied":
+                result.copied += 1
+                result.bytes_copied += size
+            elif status == "skipped":
+                result.skipped += 1
+            else:
+                getattr(result, status).append(name)
+    return result
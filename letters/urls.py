@@ -9,10 +9,12 @@ app_name = "letters"
 urlpatterns = [
     path("", views.home, name="home"),
     path("health/", views.health, name="health"),
+    path("health/db/", views.db_pool_health, name="db_pool_health"),
     path("conta/cadastro/", views.signup_view, name="signup"),
     path("conta/entrar/", views.login_view, name="login"),
     path("conta/sair/", views.logout_view, name="logout"),
     path("conta/perfil/", views.profile_view, name="profile"),
+    path("conta/perfil/exportar/", views.export_data, name="export_data"),
     path(
         "conta/recuperar-senha/",
         auth_views.PasswordResetView.as_view(
@@ -42,8 +44,11 @@ urlpatterns = [
         name="password_reset_complete",
     ),
     path("minhas-cartas/", views.history, name="history"),
+    path("minhas-cartas/importar/", views.bulk_import, name="bulk_import"),
     path("minhas-cartas/<uuid:letter_id>/editar/", views.edit_letter, name="edit_letter"),
     path("minhas-cartas/<uuid:letter_id>/excluir/", views.delete_letter, name="delete_letter"),
+    path("minhas-cartas/<uuid:letter_id>/uploads/", views.upload_create, name="upload_create"),
+    path("minhas-cartas/<uuid:letter_id>/uploads/<uuid:upload_id>/", views.upload_detail, name="upload_detail"),
     path("fotos/<int:photo_id>/excluir/", views.delete_photo, name="delete_photo"),
     path("fotos/<int:photo_id>/modo/<str:mode>/", views.set_photo_mode, name="set_photo_mode"),
     path("criar/etapa/<int:step>/", views.create_step, name="create_step"),
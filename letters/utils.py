@@ -1,12 +1,38 @@
 import base64
 import io
+import os
 import re
+import threading
+import time
 import uuid
 from decimal import Decimal
 from urllib.parse import quote_plus
 
-import qrcode
-from PIL import Image
+from . import providers
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)
+
+
+def uuid7() -> uuid.UUID:
+    """RFC 9562 UUIDv7: 48-bit Unix milliseconds, then random bits, so new ids sort after older ones.
+
+    Within one millisecond the 12-bit rand_a field acts as a counter, keeping ids from a process monotonic.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        millis = time.time_ns() // 1_000_000
+        last_millis, last_counter = _uuid7_last
+        if millis > last_millis:
+            counter = int.from_bytes(os.urandom(2), "big") & 0x3FF
+        else:
+            millis, counter = last_millis, last_counter + 1
+            if counter > 0xFFF:
+                millis, counter = last_millis + 1, 0
+        _uuid7_last = (millis, counter)
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (millis << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b
+    return uuid.UUID(int=value)
 
 
 def detect_music_provider(url: str) -> str:
@@ -53,10 +79,10 @@ def spotify_deep_link(url: str) -> str:
 
 
 def generate_qr_bytes(payload: str, box_size: int = 8) -> bytes:
-    qr = qrcode.QRCode(version=1, box_size=box_size, border=2)
+    qr = providers.qrcode().QRCode(version=1, box_size=box_size, border=2)
     qr.add_data(payload)
     qr.make(fit=True)
-    img: Image.Image = qr.make_image(fill_color="black", back_color="white")
+    img = qr.make_image(fill_color="black", back_color="white")
     buffer = io.BytesIO()
     img.save(buffer, format="PNG")
     return buffer.getvalue()
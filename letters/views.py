@@ -11,20 +11,49 @@ from pathlib import Path
 
 from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login, logout
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.views import redirect_to_login
-from django.http import FileResponse, Http404, HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
+from . import providers
+from .archives import stream_zip
+from .blobs import attach_photo, is_hashed_photo_name
+from .bulk import FILE_READ_ERRORS, import_letters, iter_rows, public_links, qr_zip_entries
+from .caching import (
+    PRIVATE_REVALIDATE,
+    PUBLIC_HOUR,
+    PUBLIC_IMMUTABLE,
+    PUBLIC_SHORT,
+    build_etag,
+    not_modified_response,
+    photo_url_epoch,
+    with_validators,
+)
 from .forms import (
+    BulkImportForm,
     LoginForm,
     PasswordProtectionForm,
     ProfileForm,
@@ -37,17 +66,30 @@ from .forms import (
     StyledPasswordChangeForm,
     UnlockForm,
 )
-from .models import LoveLetter, LovePhoto, PaymentRecord
+from .counters import view_counters
+from .export import build_export_file, export_cache_path, export_fingerprint, iter_export_and_cache, ranged_file_response
+from .db import pool_stats
+from .models import LoveLetter, LovePhoto, PaymentRecord, PhotoUpload
 from .payments import create_mercado_pago_checkout, create_stripe_checkout
-from .utils import build_pix_payload, detect_music_provider, generate_qr_base64, generate_qr_bytes, music_embed_url, spotify_deep_link
-
-try:
-    import stripe
-except Exception:  # pragma: no cover
-    stripe = None
+from .resumable import (
+    TUS_VERSION,
+    UploadError,
+    append_chunk,
+    create_upload,
+    current_offset,
+    discard_upload,
+    finish_upload,
+    parse_metadata,
+)
+from .read_models import get_letter_snapshot, get_public_snapshot, snapshot_context
+from .rollups import record_letter_paid, record_payment_status
+from .routers import primary_reads, read_from_replica, reading_from_replica, settled_on_replica
+from .search import search_letters
+from .utils import build_pix_payload, detect_music_provider, generate_qr_base64, generate_qr_bytes, music_embed_url
 
 
 WIZARD_STEPS = {1, 2, 3, 4, 5, 6}
+SEARCH_PAGE_SIZE = 20
 logger = logging.getLogger(__name__)
 
 
@@ -78,6 +120,7 @@ def _owner_required(request: HttpRequest, letter_id: str) -> LoveLetter:
     return get_object_or_404(LoveLetter, id=letter_id, user=request.user)
 
 
+@read_from_replica
 def home(request: HttpRequest) -> HttpResponse:
     examples = LoveLetter.objects.filter(is_paid=True)[:3]
     return render(request, "letters/home.html", {"examples": examples})
@@ -120,8 +163,52 @@ def logout_view(request: HttpRequest) -> HttpResponse:
 def history(request: HttpRequest) -> HttpResponse:
     if not request.user.is_authenticated:
         return redirect_to_login(request.get_full_path(), login_url=reverse("letters:login"))
-    letters = LoveLetter.objects.filter(user=request.user).prefetch_related("photos")
-    return render(request, "letters/history.html", {"letters": letters})
+    letters = LoveLetter.objects.filter(user=request.user)
+    query = request.GET.get("q", "").strip()
+    page_number = request.GET.get("page", "1")
+    summary = letters.aggregate(last_modified=Max("updated_at"), total=Count("id"), stats_changed=Max("stats__updated_at"))
+    validators = {
+        "etag": build_etag(
+            "history", request.user.pk, summary["total"], summary["last_modified"], summary["stats_changed"], query, page_number
+        ),
+        "last_modified": summary["last_modified"],
+        "cache_control": PRIVATE_REVALIDATE,
+    }
+    not_modified = not_modified_response(request, **validators)
+    if not_modified is not None:
+        return not_modified
+    context = {"query": query, "page_obj": None}
+    if query:
+        context["page_obj"] = Paginator(search_letters(request.user, query), SEARCH_PAGE_SIZE).get_page(page_number)
+        context["letters"] = context["page_obj"].object_list
+    else:
+        context["letters"] = letters.select_related("stats").prefetch_related("photos")
+    return with_validators(render(request, "letters/history.html", context), **validators)
+
+
+@require_http_methods(["GET", "POST"])
+def bulk_import(request: HttpRequest) -> HttpResponse:
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path(), login_url=reverse("letters:login"))
+    form = BulkImportForm(request.POST or None, request.FILES or None)
+    errors: list[str] = []
+    if request.method == "POST" and form.is_valid():
+        upload = form.cleaned_data["file"]
+        try:
+            result = import_letters(request.user, iter_rows(upload.file, upload.name))
+        except FILE_READ_ERRORS as exc:
+            result = None
+            errors = [f"Nao foi possivel ler o arquivo: {exc}"]
+        if result is not None and not result.errors and result.letters:
+            links = public_links(result.letters, request.build_absolute_uri("/"))
+            response = StreamingHttpResponse(
+                stream_zip(qr_zip_entries(result.letters, links)), content_type="application/zip"
+            )
+            response["Content-Disposition"] = 'attachment; filename="cartas-qr.zip"'
+            return response
+        if result is not None:
+            errors = result.errors[:50] or ["O arquivo nao tem nenhuma carta."]
+    return render(request, "letters/bulk_import.html", {"form": form, "errors": errors})
 
 
 @require_http_methods(["GET", "POST"])
@@ -147,7 +234,7 @@ def edit_letter(request: HttpRequest, letter_id: str) -> HttpResponse:
         if form_type == "photos" and photos_form.is_valid():
             files = photos_form.cleaned_data["photos"]
             for image in files:
-                LovePhoto.objects.create(letter=letter, image=image)
+                attach_photo(letter, image)
             if files:
                 messages.success(request, f"{len(files)} foto(s) adicionada(s).")
             return redirect("letters:edit_letter", letter_id=str(letter.id))
@@ -229,6 +316,32 @@ def profile_view(request: HttpRequest) -> HttpResponse:
     )
 
 
+@require_GET
+def export_data(request: HttpRequest) -> HttpResponse:
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path(), login_url=reverse("letters:login"))
+    fingerprint = export_fingerprint(request.user)
+    etag = f'"{fingerprint}"'
+    path = export_cache_path(request.user, fingerprint)
+    filename = f"cartas-de-amor-{request.user.username}.zip"
+    cache_control = {"private": True, "no_store": True}
+    not_modified = not_modified_response(request, etag=etag, last_modified=None, cache_control=cache_control)
+    if not_modified is not None:
+        return not_modified
+
+    if not path.exists():
+        if "Range" not in request.headers:
+            # First download streams while the archive is cached; later requests can resume with Range.
+            response = StreamingHttpResponse(iter_export_and_cache(request.user, path), content_type="application/zip")
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return with_validators(response, etag=etag, last_modified=None, cache_control=cache_control)
+        build_export_file(request.user, path)
+
+    response = ranged_file_response(request, path, etag=etag, filename=filename)
+    response["Accept-Ranges"] = "bytes"
+    return with_validators(response, etag=etag, last_modified=None, cache_control=cache_control)
+
+
 @require_http_methods(["GET", "POST"])
 def create_step(request: HttpRequest, step: int) -> HttpResponse:
     if not request.user.is_authenticated:
@@ -271,7 +384,7 @@ def create_step(request: HttpRequest, step: int) -> HttpResponse:
             files = form.cleaned_data["photos"]
             try:
                 for image in files:
-                    LovePhoto.objects.create(letter=letter, image=image)
+                    attach_photo(letter, image)
             except Exception:
                 logger.exception("Erro ao salvar fotos da carta %s", letter.id)
                 messages.error(
@@ -284,15 +397,24 @@ def create_step(request: HttpRequest, step: int) -> HttpResponse:
                     {"form": form, "step": step, "letter": letter, "photos": letter.photos.all()},
                     status=500,
                 )
-            if files:
-                messages.success(request, f"{len(files)} foto(s) adicionada(s) com sucesso.")
+            # Photos sent through the resumable endpoint are already attached; the form only reports them.
+            uploaded = len(files) or _int_or_zero(request.POST.get("uploaded"))
+            if uploaded:
+                messages.success(request, f"{uploaded} foto(s) adicionada(s) com sucesso.")
             else:
                 messages.info(request, "Nenhuma foto adicionada. Voce pode continuar sem fotos.")
             return redirect("letters:create_step", step=5)
         return render(
             request,
             "letters/wizard_step_4.html",
-            {"form": form, "step": step, "letter": letter, "photos": letter.photos.all()},
+            {
+                "form": form,
+                "step": step,
+                "letter": letter,
+                "photos": letter.photos.all(),
+                "upload_chunk_size": settings.RESUMABLE_UPLOAD_CHUNK_KB * 1024,
+                "upload_concurrency": settings.RESUMABLE_UPLOAD_CONCURRENCY,
+            },
         )
 
     if step == 5:
@@ -304,11 +426,17 @@ def create_step(request: HttpRequest, step: int) -> HttpResponse:
             return redirect("letters:create_step", step=6)
         return render(request, "letters/wizard_step_5.html", {"form": form, "step": step, "letter": letter})
 
-    password_form = PasswordProtectionForm(request.POST or None)
+    password_form = PasswordProtectionForm(
+        request.POST or None, initial={"release_at": letter.release_at}, current_release_at=letter.release_at
+    )
     if request.method == "POST" and password_form.is_valid():
         password = password_form.cleaned_data.get("password")
         letter.password_hash = make_password(password) if password else ""
-        letter.save(update_fields=["password_hash", "updated_at"])
+        if password_form.release_at_changed:
+            # Only a new schedule re-arms the release sweeper; re-saving must not resend the "liberada" email.
+            letter.release_at = password_form.cleaned_data.get("release_at")
+            letter.release_processed_at = None
+        letter.save(update_fields=["password_hash", "release_at", "release_processed_at", "updated_at"])
         messages.success(request, "Privacidade atualizada.")
         return redirect("letters:preview", letter_id=str(letter.id))
     return render(
@@ -323,15 +451,89 @@ def create_step(request: HttpRequest, step: int) -> HttpResponse:
     )
 
 
+def _int_or_zero(value) -> int:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _upload_response(status: int, **headers) -> HttpResponse:
+    response = HttpResponse(status=status)
+    response["Tus-Resumable"] = TUS_VERSION
+    response["Cache-Control"] = "no-store"
+    for name, value in headers.items():
+        response[name.replace("_", "-")] = str(value)
+    return response
+
+
+def _upload_error(error: UploadError) -> HttpResponse:
+    response = HttpResponse(str(error), status=error.status, content_type="text/plain; charset=utf-8")
+    response["Tus-Resumable"] = TUS_VERSION
+    return response
+
+
+@require_POST
+def upload_create(request: HttpRequest, letter_id: str) -> HttpResponse:
+    letter = _owner_required(request, letter_id)
+    try:
+        length = int(request.headers.get("Upload-Length", ""))
+    except ValueError:
+        return _upload_error(UploadError("Upload-Length obrigatorio."))
+    try:
+        metadata = parse_metadata(request.headers.get("Upload-Metadata", ""))
+        upload = create_upload(letter, length=length, filename=metadata.get("filename", ""))
+    except UploadError as error:
+        return _upload_error(error)
+    location = reverse("letters:upload_detail", kwargs={"letter_id": str(letter.id), "upload_id": str(upload.id)})
+    return _upload_response(201, Location=location, Upload_Offset=0)
+
+
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def upload_detail(request: HttpRequest, letter_id: str, upload_id: str) -> HttpResponse:
+    letter = _owner_required(request, letter_id)
+    upload = get_object_or_404(PhotoUpload, id=upload_id, letter=letter)
+    if request.method == "HEAD":
+        return _upload_response(200, Upload_Offset=current_offset(upload), Upload_Length=upload.length)
+    if request.method == "DELETE":
+        discard_upload(upload)
+        return _upload_response(204)
+
+    if request.content_type != "application/offset+octet-stream":
+        return _upload_error(UploadError("Content-Type deve ser application/offset+octet-stream.", status=415))
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        content_length = int(request.headers.get("Content-Length", ""))
+    except ValueError:
+        return _upload_error(UploadError("Upload-Offset e Content-Length sao obrigatorios."))
+    try:
+        offset = append_chunk(upload, request, offset=offset, content_length=content_length)
+        if offset < upload.length:
+            return _upload_response(204, Upload_Offset=offset)
+        photo = finish_upload(upload)
+    except UploadError as error:
+        return _upload_error(error)
+    return _upload_response(204, Upload_Offset=offset, Photo_Id=photo.id)
+
+
 @require_GET
 def preview(request: HttpRequest, letter_id: str) -> HttpResponse:
-    letter = _owner_required(request, letter_id)
-    _set_current_letter_id(request, str(letter.id))
-    return render(
-        request,
-        "letters/preview.html",
-        {"letter": letter, "music_embed": music_embed_url(letter.music_url, letter.music_provider)},
-    )
+    if not request.user.is_authenticated:
+        raise Http404
+    snapshot = get_letter_snapshot(letter_id, user=request.user)
+    if snapshot is None:
+        raise Http404
+    _set_current_letter_id(request, snapshot.data["id"])
+    validators = {
+        "etag": build_etag("preview", snapshot.pk, snapshot.version, snapshot.updated_at, request.user.pk, photo_url_epoch()),
+        "last_modified": snapshot.updated_at,
+        "cache_control": PRIVATE_REVALIDATE,
+    }
+    not_modified = not_modified_response(request, **validators)
+    if not_modified is not None:
+        return not_modified
+    response = render(request, "letters/preview.html", snapshot_context(snapshot.data))
+    return with_validators(response, **validators)
 
 
 @require_http_methods(["GET", "POST"])
@@ -398,40 +600,70 @@ def simulate_payment(request: HttpRequest, letter_id: str, method: str) -> HttpR
     if method not in {"pix", "stripe", "mercado_pago"}:
         return HttpResponseForbidden("Método inválido")
     payment_record, _ = PaymentRecord.objects.get_or_create(letter=letter, method=method, defaults={"amount": letter.price})
+    previous_status = payment_record.status
     payment_record.status = "paid"
     payment_record.provider_payment_id = payment_record.provider_payment_id or f"sim-{method}-{letter.id}"
     payment_record.raw_payload = {"simulated": True, "confirmed_at": timezone.now().isoformat()}
-    payment_record.save(update_fields=["status", "provider_payment_id", "raw_payload", "updated_at"])
-    _mark_letter_paid(letter)
+    with transaction.atomic():
+        payment_record.save(update_fields=["status", "provider_payment_id", "raw_payload", "updated_at"])
+        if previous_status != "paid":
+            record_payment_status(method, "paid")
+        _mark_letter_paid(letter, method)
     return redirect("letters:payment", letter_id=str(letter.id))
 
 
-def _mark_letter_paid(letter: LoveLetter) -> None:
-    if not letter.is_paid:
+def _mark_letter_paid(letter: LoveLetter, method: str) -> None:
+    if letter.is_paid:
+        return
+    with transaction.atomic():
+        # Fetch the row itself under the lock: a second webhook blocks here until the first commits, then sees
+        # is_paid and leaves, so the sale is counted in the rollups only once.
+        locked = LoveLetter.objects.select_for_update().only("is_paid").get(pk=letter.pk)
+        if locked.is_paid:
+            letter.is_paid = True
+            return
         letter.is_paid = True
         letter.paid_at = timezone.now()
         letter.save(update_fields=["is_paid", "paid_at", "updated_at"])
+        record_letter_paid(letter, method)
 
 
+@read_from_replica
 @require_GET
 def public_letter(request: HttpRequest, letter_id: str) -> HttpResponse:
-    letter = get_object_or_404(LoveLetter, id=letter_id)
-    if not letter.is_paid:
-        return redirect("letters:payment", letter_id=str(letter.id))
-    unlock_session_key = f"letter_unlocked_{letter.id}"
-    if letter.password_hash and not request.session.get(unlock_session_key):
-        return redirect("letters:unlock_letter", letter_id=str(letter.id))
+    snapshot = get_public_snapshot(letter_id)
+    if snapshot is None:
+        raise Http404
+    data = snapshot.data
+    if not data["is_paid"]:
+        return redirect("letters:payment", letter_id=data["id"])
+    is_owner = request.user.pk == data["user_id"]
+    release_at = parse_datetime(data["release_at"]) if data["release_at"] else None
+    if release_at and release_at > timezone.now() and not is_owner:
+        response = render(request, "letters/scheduled.html", {"letter": data, "release_at": release_at})
+        seconds_left = int((release_at - timezone.now()).total_seconds())
+        patch_cache_control(response, private=True, max_age=max(min(seconds_left, 60), 0))
+        return response
+    unlock_session_key = f"letter_unlocked_{data['id']}"
+    if data["is_protected"] and not request.session.get(unlock_session_key):
+        return redirect("letters:unlock_letter", letter_id=data["id"])
+    view_counters.record(data["id"], opened=not is_owner)
     auto_play = request.GET.get("auto_play", "1") == "1"
-    return render(
-        request,
-        "letters/public_letter.html",
-        {
-            "letter": letter,
-            "music_embed": music_embed_url(letter.music_url, letter.music_provider),
-            "spotify_deep_link": spotify_deep_link(letter.music_url) if letter.music_provider == "spotify" else "",
-            "auto_play": auto_play,
-        },
-    )
+    # Only anonymous views of unprotected letters are identical for everyone and safe for shared caches.
+    shared = not data["is_protected"] and not request.user.is_authenticated
+    validators = {
+        "etag": build_etag(
+            "public", snapshot.pk, snapshot.version, snapshot.updated_at, request.user.pk or 0, auto_play, photo_url_epoch()
+        ),
+        "last_modified": snapshot.updated_at,
+        "cache_control": PUBLIC_SHORT if shared else PRIVATE_REVALIDATE,
+    }
+    not_modified = not_modified_response(request, **validators)
+    if not_modified is not None:
+        return not_modified
+    context = snapshot_context(data)
+    context["auto_play"] = auto_play
+    return with_validators(render(request, "letters/public_letter.html", context), **validators)
 
 
 @require_http_methods(["GET", "POST"])
@@ -450,9 +682,15 @@ def unlock_letter(request: HttpRequest, letter_id: str) -> HttpResponse:
     return render(request, "letters/unlock.html", {"form": form, "letter": letter})
 
 
+@read_from_replica
 @require_GET
 def letter_qr(request: HttpRequest, letter_id: str) -> HttpResponse:
-    letter = get_object_or_404(LoveLetter, id=letter_id)
+    letter = LoveLetter.objects.filter(id=letter_id).first()
+    if reading_from_replica() and (letter is None or not letter.is_paid or not settled_on_replica(letter.updated_at)):
+        with primary_reads():
+            letter = LoveLetter.objects.filter(id=letter_id).first()
+    if letter is None:
+        raise Http404
     if not letter.is_paid:
         return HttpResponseForbidden("Pagamento pendente.")
     public_link = request.build_absolute_uri(reverse("letters:public_letter", kwargs={"letter_id": str(letter.id)})) + "?auto_play=1"
@@ -467,7 +705,8 @@ def letter_qr(request: HttpRequest, letter_id: str) -> HttpResponse:
 def stripe_webhook(request: HttpRequest) -> HttpResponse:
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE", "")
-    if settings.STRIPE_WEBHOOK_SECRET and stripe is not None:
+    stripe = providers.stripe() if settings.STRIPE_WEBHOOK_SECRET else None
+    if stripe is not None:
         try:
             event = stripe.Webhook.construct_event(payload, sig_header, settings.STRIPE_WEBHOOK_SECRET)
         except Exception:
@@ -483,8 +722,16 @@ def stripe_webhook(request: HttpRequest) -> HttpResponse:
         if letter_id:
             letter = LoveLetter.objects.filter(id=letter_id).first()
             if letter:
-                PaymentRecord.objects.filter(provider_payment_id=session_id).update(status="paid")
-                _mark_letter_paid(letter)
+                with transaction.atomic():
+                    # Sessions are almost always recent, so try the pruned lookup first and only then every partition.
+                    updated = 0
+                    for payments in (PaymentRecord.objects.hot(), PaymentRecord.objects.all()):
+                        payments = payments.filter(provider_payment_id=session_id).exclude(status="paid")
+                        updated = payments.update(status="paid", updated_at=timezone.now())
+                        if updated:
+                            break
+                    record_payment_status("stripe", "paid", updated)
+                    _mark_letter_paid(letter, "stripe")
     return HttpResponse(status=200)
 
 
@@ -507,8 +754,10 @@ def mercado_pago_webhook(request: HttpRequest) -> HttpResponse:
     if external_reference:
         letter = LoveLetter.objects.filter(id=external_reference).first()
         if letter:
-            PaymentRecord.objects.filter(letter=letter, method="mercado_pago").update(status="paid")
-            _mark_letter_paid(letter)
+            with transaction.atomic():
+                payments = PaymentRecord.objects.filter(letter=letter, method="mercado_pago").exclude(status="paid")
+                record_payment_status("mercado_pago", "paid", payments.update(status="paid", updated_at=timezone.now()))
+                _mark_letter_paid(letter, "mercado_pago")
     return HttpResponse(status=200)
 
 
@@ -517,6 +766,12 @@ def health(request: HttpRequest) -> JsonResponse:
     return JsonResponse({"status": "ok", "time": datetime.utcnow().isoformat()})
 
 
+@staff_member_required
+@require_GET
+def db_pool_health(request: HttpRequest) -> JsonResponse:
+    return JsonResponse({"pool": pool_stats()})
+
+
 @require_GET
 def media_file(request: HttpRequest, file_path: str) -> HttpResponse:
     # Try current and legacy media roots to avoid broken links after deploy/storage changes.
@@ -531,7 +786,7 @@ def media_file(request: HttpRequest, file_path: str) -> HttpResponse:
         if candidate.exists() and candidate.is_file():
             content_type, _ = mimetypes.guess_type(candidate.name)
             response = FileResponse(open(candidate, "rb"), content_type=content_type or "application/octet-stream")
-            response["Cache-Control"] = "public, max-age=3600"
+            patch_cache_control(response, **(PUBLIC_IMMUTABLE if is_hashed_photo_name(file_path) else PUBLIC_HOUR))
             return response
 
     raise Http404("Arquivo de midia nao encontrado.")
@@ -186,6 +186,146 @@ if (photosInput && previewGrid) {
   });
 }
 
+const resumableForm = document.querySelector("form[data-resumable-upload]");
+if (resumableForm && photosInput && window.fetch && window.Blob && Blob.prototype.slice) {
+  const endpoint = resumableForm.dataset.resumableUpload;
+  const chunkSize = Number(resumableForm.dataset.chunkSize) || 512 * 1024;
+  const concurrency = Number(resumableForm.dataset.concurrency) || 2;
+  const csrfToken = resumableForm.querySelector("[name=csrfmiddlewaretoken]")?.value || "";
+  const submitButtons = Array.from(resumableForm.querySelectorAll('button[type="submit"], button:not([type])'));
+  const buttonLabels = new Map(submitButtons.map((button) => [button, button.innerHTML]));
+  const completed = new Set();
+
+  const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  // Network errors and 5xx are retried with backoff; 4xx go back to the caller.
+  const uploadRequest = async (url, options, retries = 5) => {
+    for (let attempt = 0; ; attempt += 1) {
+      try {
+        const response = await fetch(url, {
+          ...options,
+          credentials: "same-origin",
+          headers: { "X-CSRFToken": csrfToken, "Tus-Resumable": "1.0.0", ...(options.headers || {}) },
+        });
+        if (response.status < 500 || attempt >= retries) return response;
+      } catch (error) {
+        if (attempt >= retries) throw error;
+      }
+      await wait(Math.min(1000 * 2 ** attempt, 15000));
+    }
+  };
+
+  const failWith = async (response, fallback) => {
+    const text = response ? await response.text() : "";
+    throw new Error(text || fallback);
+  };
+
+  const uploadFile = async (file, onProgress) => {
+    const storageKey = `upload:${endpoint}:${file.name}:${file.size}:${file.lastModified}`;
+    let location = localStorage.getItem(storageKey);
+    let offset = 0;
+
+    // Resume an earlier attempt for the same file if the server still has it.
+    if (location) {
+      const head = await uploadRequest(location, { method: "HEAD" });
+      if (head.ok) {
+        offset = Number(head.headers.get("Upload-Offset")) || 0;
+      } else {
+        location = null;
+      }
+    }
+    if (!location) {
+      const encodedName = btoa(unescape(encodeURIComponent(file.name)));
+      const created = await uploadRequest(endpoint, {
+        method: "POST",
+        headers: { "Upload-Length": String(file.size), "Upload-Metadata": `filename ${encodedName}` },
+      });
+      if (created.status !== 201) await failWith(created, "Nao foi possivel iniciar o envio.");
+      location = created.headers.get("Location");
+      localStorage.setItem(storageKey, location);
+    }
+
+    let resyncs = 0;
+    while (offset < file.size) {
+      onProgress(offset);
+      const response = await uploadRequest(location, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/offset+octet-stream", "Upload-Offset": String(offset) },
+        body: file.slice(offset, offset + chunkSize),
+      });
+      if (response.status === 204) {
+        offset = Number(response.headers.get("Upload-Offset")) || offset;
+        resyncs = 0;
+        continue;
+      }
+      if (![409, 423].includes(response.status) || resyncs >= 10) {
+        localStorage.removeItem(storageKey);
+        await failWith(response, "Nao foi possivel enviar a foto.");
+      }
+      // Another attempt already wrote part of this range: ask where to continue from.
+      resyncs += 1;
+      await wait(500 * resyncs);
+      const head = await uploadRequest(location, { method: "HEAD" });
+      if (!head.ok) await failWith(head, "Envio expirado.");
+      offset = Number(head.headers.get("Upload-Offset")) || 0;
+    }
+    localStorage.removeItem(storageKey);
+    onProgress(file.size);
+  };
+
+  const resetForm = () => {
+    resumableForm.dataset.submitting = "false";
+    hidePageLoading();
+    submitButtons.forEach((button) => {
+      button.disabled = false;
+      button.classList.remove("opacity-70", "cursor-not-allowed");
+      button.innerHTML = buttonLabels.get(button);
+    });
+  };
+
+  resumableForm.addEventListener("submit", async (event) => {
+    const selected = Array.from(photosInput.files || []);
+    if (!selected.length) return;
+    event.preventDefault();
+    // After a partial failure only the photos that did not finish are sent again.
+    const files = selected.filter((file) => !completed.has(file));
+
+    const totalBytes = files.reduce((sum, file) => sum + file.size, 0) || 1;
+    const sent = new Map();
+    const reportProgress = (file, bytes) => {
+      sent.set(file, bytes);
+      const done = Array.from(sent.values()).reduce((sum, value) => sum + value, 0);
+      if (photosFeedback) photosFeedback.textContent = `Enviando fotos... ${Math.floor((done / totalBytes) * 100)}%`;
+    };
+
+    const queue = [...files];
+    const errors = [];
+    const worker = async () => {
+      while (queue.length) {
+        const file = queue.shift();
+        try {
+          await uploadFile(file, (bytes) => reportProgress(file, bytes));
+          completed.add(file);
+        } catch (error) {
+          errors.push(`${file.name}: ${error.message}`);
+        }
+      }
+    };
+    await Promise.all(Array.from({ length: Math.min(concurrency, files.length) }, worker));
+
+    if (errors.length) {
+      resetForm();
+      if (photosFeedback) {
+        photosFeedback.textContent = `${errors.join(" ")} Toque em Continuar para tentar de novo; o envio retoma de onde parou.`;
+      }
+      return;
+    }
+    photosInput.value = "";
+    resumableForm.querySelector("[name=uploaded]").value = String(completed.size);
+    HTMLFormElement.prototype.submit.call(resumableForm);
+  });
+}
+
 const items = [
   "Aniversario de namoro",
   "Dia dos Namorados",